@@ -11,6 +11,7 @@ import matplotlib.pyplot as plt
 import io
 import requests
 from urllib.request import urlopen
+from compiled_model import ForestArrays
 
 # Load the dataset
 url = "https://hebbkx1anhila5yf.public.blob.vercel-storage.com/Train_data-1-3mTbn73wPHfwMlrH9RoeNlHT3DTNu0.csv"
@@ -170,24 +171,22 @@ def predict_loan_risk(data_point, model=model, feature_names=feature_names, risk
     # Calculate risk percentage (probability of being high risk)
     risk_percentage = risk_proba[2] * 100 if len(risk_proba) > 2 else 0
     
-    # Get feature contributions
-    # For this, we'll use the feature importances multiplied by the feature values
-    feature_contributions = {}
-    
-    # Get preprocessed features
+    # Get feature contributions from the forest's decision paths: the change in
+    # high-risk probability at each split, credited to the split feature
     preprocessed = model.named_steps['preprocessor'].transform(input_df)
+    if hasattr(preprocessed, 'toarray'):
+        preprocessed = preprocessed.toarray()
+    classifier = model.named_steps['classifier']
+    high_risk = [int(np.argmax(classifier.classes_))]
+    _, _, contributions = ForestArrays([classifier]).contributions(preprocessed, high_risk)
     
-    # Calculate contribution for each feature
+    feature_contributions = {}
     for i, feature in enumerate(feature_names):
         if i < preprocessed.shape[1]:
-            importance = model.named_steps['classifier'].feature_importances_[i]
-            # Normalize the preprocessed value for better interpretation
-            value = preprocessed[0, i]
-            contribution = importance * abs(value) * 100  # Convert to percentage
-            feature_contributions[feature] = contribution
+            feature_contributions[feature] = contributions[0, i, 0] * 100  # Convert to percentage points
     
     # Sort contributions by importance
-    sorted_contributions = sorted(feature_contributions.items(), key=lambda x: x[1], reverse=True)
+    sorted_contributions = sorted(feature_contributions.items(), key=lambda x: abs(x[1]), reverse=True)
     top_factors = sorted_contributions[:5]  # Top 5 contributing factors
     
     return {
@@ -226,7 +225,7 @@ print(f"Description: {risk_assessment['risk_description']}")
 print(f"Approval Chance: {risk_assessment['approval_chance']}")
 print("\nTop Contributing Factors:")
 for factor, contribution in risk_assessment['top_contributing_factors']:
-    print(f"- {factor}: {contribution:.2f}%")
+    print(f"- {factor}: {contribution:+.2f}%")
 
 # Save the model
 model_filename = 'loan_risk_assessment_model.pkl'
@@ -0,0 +1,42 @@
+import os
+
+import joblib
+
+# Cascade scoring: a small screen model answers clear cases, the full ensemble the rest
+CASCADE_ENABLED = os.environ.get('CASCADE_ENABLED', '0') == '1'
+CASCADE_MODEL_FILE = os.environ.get('CASCADE_MODEL_FILE', os.path.join('saved_models', 'cascade_screen.pkl'))
+
+# Default uncertainty band in high-risk percent; the artifact and env vars can override it
+DEFAULT_BAND = (5.0, 40.0)
+
+class CascadeScreen:
+    """Screen model plus the high-risk band inside which the full ensemble still runs"""
+
+    def __init__(self, model, band_low, band_high, metadata=None):
+        if band_low > band_high:
+            raise ValueError(f"Cascade band is inverted: {band_low} > {band_high}")
+        self.model = model
+        self.band_low = band_low
+        self.band_high = band_high
+        self.metadata = metadata or {}
+
+    def is_clear(self, risk_pct):
+        """True when the screen's high-risk percentage falls outside the uncertainty band"""
+        return risk_pct < self.band_low or risk_pct > self.band_high
+
+def load_cascade_screen(path=CASCADE_MODEL_FILE):
+    """CascadeScreen from a saved artifact, or None when it is missing or unreadable"""
+    if not os.path.exists(path):
+        print(f"⚠️ Cascade enabled but no screen model at {path}; run scripts/train_cascade_screen.py")
+        return None
+    try:
+        artifact = joblib.load(path)
+        band_low, band_high = artifact.get('band', DEFAULT_BAND)
+        band_low = float(os.environ.get('CASCADE_BAND_LOW', band_low))
+        band_high = float(os.environ.get('CASCADE_BAND_HIGH', band_high))
+        screen = CascadeScreen(artifact['model'], band_low, band_high, artifact.get('metadata'))
+        print(f"📁 Cascade screen loaded from {path} (full ensemble for {band_low:.1f}%-{band_high:.1f}% high risk)")
+        return screen
+    except Exception as e:
+        print(f"✗ Error loading cascade screen from {path}: {e}")
+        return None
@@ -0,0 +1,450 @@
+import os
+
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.isotonic import IsotonicRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, RobustScaler
+
+from feature_schema import FeatureSchema
+
+# Serving drops a model's fitted sklearn trees once it compiles: only the DataFrame fallback reads
+# them, and that runs only for models that could not be compiled, so keeping both doubles the memory
+RELEASE_COMPILED_FORESTS = os.environ.get('RELEASE_COMPILED_FORESTS', '1') == '1'
+
+def top_factors(columns, contributions, k=5):
+    """The k columns with the largest absolute attribution, as (column, contribution) pairs"""
+    order = np.argsort(-np.abs(contributions))[:k]
+    return [(columns[i], float(contributions[i])) for i in order if contributions[i] != 0]
+
+class ForestArrays:
+    """The trees of one or more fitted forests flattened into shared node arrays
+
+    Forest g reads its inputs from the columns starting at feature_offsets[g]
+    of a combined input matrix, so all calibration folds are traversed together.
+    """
+
+    def __init__(self, forests, feature_offsets=None):
+        feature_offsets = feature_offsets or [0] * len(forests)
+        features, thresholds, lefts, rights, missing_left, values, roots = [], [], [], [], [], [], []
+        group_sizes = []
+        offset = 0
+        for forest, feature_offset in zip(forests, feature_offsets):
+            group_sizes.append(len(forest.estimators_))
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                roots.append(offset)
+                features.append(np.where(tree.feature >= 0, tree.feature + feature_offset, -1))
+                thresholds.append(tree.threshold)
+                lefts.append(np.where(tree.children_left >= 0, tree.children_left + offset, -1))
+                rights.append(np.where(tree.children_right >= 0, tree.children_right + offset, -1))
+                missing_left.append(getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8)))
+                if isinstance(forest, RandomForestRegressor):
+                    # Regression leaves hold one value per output
+                    values.append(tree.value[:, :, 0])
+                else:
+                    node_values = tree.value[:, 0, :]
+                    values.append(node_values / node_values.sum(axis=1, keepdims=True))
+                offset += tree.node_count
+
+        self.feature = np.concatenate(features).astype(np.int32)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts).astype(np.int32)
+        self.right = np.concatenate(rights).astype(np.int32)
+        self.missing_left = np.concatenate(missing_left).astype(bool)
+        self.value = np.concatenate(values)
+        self.roots = np.array(roots, dtype=np.int32)
+        self.n_trees = len(roots)
+        self.n_classes = self.value.shape[1]
+        self.max_depth = max(e.tree_.max_depth for forest in forests for e in forest.estimators_)
+
+        # Trees are grouped per forest and every forest carries equal weight
+        self.group_sizes = np.array(group_sizes)
+        self.group_starts = np.r_[0, np.cumsum(group_sizes)[:-1]]
+        self.tree_group = np.repeat(np.arange(len(forests)), group_sizes)
+        self.tree_weight = 1.0 / (len(forests) * self.group_sizes[self.tree_group])
+
+    def _step(self, X, rows, node):
+        """Advance every (row, tree) cursor one level; returns the new nodes and split mask"""
+        feature = self.feature[node]
+        active = feature >= 0
+        x = X[rows, np.where(active, feature, 0)]
+        go_left = np.where(np.isnan(x), self.missing_left[node], x <= self.threshold[node])
+        child = np.where(go_left, self.left[node], self.right[node])
+        return np.where(active, child, node), active, feature
+
+    def apply(self, X, trees=None):
+        """Leaf reached by each row in each tree (or in the given tree indices)"""
+        # Trees compare float32 inputs against float64 thresholds, as sklearn does
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        roots = self.roots if trees is None else self.roots[trees]
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        node = np.broadcast_to(roots, (X.shape[0], len(roots))).copy()
+        for _ in range(self.max_depth):
+            node, active, _ = self._step(X, rows, node)
+            if not active.any():
+                break
+        return node
+
+    def group_proba(self, leaves):
+        """Per-forest mean leaf distribution, shape (rows, forests, classes)"""
+        sums = np.add.reduceat(self.value[leaves], self.group_starts, axis=1)
+        return sums / self.group_sizes[np.newaxis, :, np.newaxis]
+
+    def predict_proba(self, X):
+        """Each forest's probabilities, as RandomForestClassifier.predict_proba"""
+        return self.group_proba(self.apply(X))
+
+    def contributions(self, X, classes=None):
+        """Decision-path attributions averaged over the forests
+
+        Returns per-forest probabilities, the bias and per-feature contributions
+        for the requested class columns. Each split adds the change in class
+        distribution between a node and the child taken to the split feature, so
+        bias + contributions.sum(axis=1) is the forests' mean probability.
+        """
+        classes = np.arange(self.n_classes) if classes is None else np.asarray(classes)
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_rows, n_features = X.shape
+        rows = np.arange(n_rows)[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        # Nodes visited at each depth; finished trees repeat their leaf, adding zero deltas
+        path = [node]
+        for _ in range(self.max_depth):
+            node, active, _ = self._step(X, rows, node)
+            if not active.any():
+                break
+            path.append(node)
+        path = np.stack(path)
+        values = self.value[path][..., classes] * self.tree_weight[:, np.newaxis]
+        bias = values[0, 0].sum(axis=0)
+        contrib = np.zeros((n_rows * n_features, len(classes)))
+        if len(path) > 1:
+            feature = np.maximum(self.feature[path[:-1]], 0)
+            index = (feature + rows * n_features).ravel()
+            delta = (values[1:] - values[:-1]).reshape(-1, len(classes))
+            for c in range(len(classes)):
+                contrib[:, c] = np.bincount(index, weights=delta[:, c], minlength=n_rows * n_features)
+        return self.group_proba(node), bias, contrib.reshape(n_rows, n_features, len(classes))
+
+class CompiledPreprocessor:
+    """A fitted RobustScaler/OneHotEncoder ColumnTransformer as array operations"""
+
+    def __init__(self, preprocessor, schema):
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise ValueError("Expected a ColumnTransformer preprocessor")
+
+        # Map the transformers onto the shared schema column order
+        self.numeric_index = np.arange(0)
+        self.center = self.scale = None
+        self.category_lookups = []
+        n_outputs = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == 'remainder' or transformer == 'drop':
+                continue
+            if name == 'num' and isinstance(transformer, RobustScaler):
+                self.numeric_index = np.array([schema.numeric_features.index(col) for col in columns])
+                self.center = transformer.center_ if transformer.with_centering else None
+                self.scale = transformer.scale_ if transformer.with_scaling else None
+                n_outputs += len(columns)
+            elif name == 'cat' and isinstance(transformer, OneHotEncoder):
+                if transformer.drop_idx_ is not None:
+                    raise ValueError("Dropped one-hot categories are not supported")
+                for col, categories in zip(columns, transformer.categories_):
+                    lookup = {value: n_outputs + i for i, value in enumerate(categories)}
+                    self.category_lookups.append((schema.categorical_features.index(col), lookup))
+                    n_outputs += len(categories)
+            else:
+                raise ValueError(f"Unsupported transformer '{name}'")
+        self.n_outputs = n_outputs
+        self.n_numeric = len(self.numeric_index)
+
+        # 0/1 matrix folding transformed columns back onto schema columns
+        self.output_to_column = np.zeros((n_outputs, len(schema.columns)))
+        self.output_to_column[np.arange(self.n_numeric), self.numeric_index] = 1.0
+        for col, lookup in self.category_lookups:
+            self.output_to_column[list(lookup.values()), len(schema.numeric_features) + col] = 1.0
+
+    def transform(self, numeric, categorical, out=None):
+        """Preprocessor output for the buffered rows, written into out when given"""
+        n_rows = numeric.shape[0]
+        X = np.zeros((n_rows, self.n_outputs), dtype=np.float64) if out is None else out
+        block = numeric[:, self.numeric_index]
+        if self.center is not None:
+            block = block - self.center
+        if self.scale is not None:
+            block = block / self.scale
+        X[:, :self.n_numeric] = block
+        for col, lookup in self.category_lookups:
+            for row in range(n_rows):
+                position = lookup.get(categorical[row, col])
+                if position is not None:
+                    X[row, position] = 1.0
+        return X
+
+class CompiledFold(CompiledPreprocessor):
+    """One calibration fold: preprocessing as arrays and isotonic maps; the forest is flattened by CompiledModel"""
+
+    def __init__(self, calibrated_classifier, schema, classes):
+        pipeline = calibrated_classifier.estimator
+        if not isinstance(pipeline, Pipeline):
+            raise ValueError("Expected a Pipeline inside the calibrated classifier")
+        forest = pipeline.named_steps.get('classifier')
+        if not isinstance(forest, RandomForestClassifier):
+            raise ValueError("Expected a RandomForestClassifier")
+        super().__init__(pipeline.named_steps.get('preprocessor'), schema)
+
+        # Column in the calibrated output for each forest class
+        self.class_columns = np.searchsorted(classes, forest.classes_)
+        self.calibrators = []
+        for calibrator in calibrated_classifier.calibrators:
+            if not isinstance(calibrator, IsotonicRegression):
+                raise ValueError("Only isotonic calibration is supported")
+            self.calibrators.append((calibrator.X_min_, calibrator.X_max_,
+                                     calibrator.X_thresholds_, calibrator.y_thresholds_))
+        self.n_classes = len(classes)
+
+    def isotonic(self, forest_proba):
+        """Per-class isotonic outputs before normalisation"""
+        proba = np.zeros((forest_proba.shape[0], self.n_classes))
+        for i, (x_min, x_max, x_thresholds, y_thresholds) in enumerate(self.calibrators):
+            # Binary forests are calibrated on the positive-class column only
+            source = i + 1 if self.n_classes == 2 else i
+            column = self.class_columns[source] if self.n_classes == 2 else self.class_columns[i]
+            proba[:, column] = np.interp(np.clip(forest_proba[:, source], x_min, x_max), x_thresholds, y_thresholds)
+        return proba
+
+    def calibrate(self, forest_proba):
+        """Apply the fold's isotonic calibrators (as CalibratedClassifierCV does)"""
+        proba = self.isotonic(forest_proba)
+        if self.n_classes == 2:
+            proba[:, 0] = 1.0 - proba[:, 1]
+        else:
+            denominator = proba.sum(axis=1)[:, np.newaxis]
+            uniform = np.full_like(proba, 1 / self.n_classes)
+            proba = np.divide(proba, denominator, out=uniform, where=denominator != 0)
+        proba[(1.0 < proba) & (proba <= 1.0 + 1e-5)] = 1.0
+        return proba
+
+    def class_bounds(self, low, high):
+        """Bounds on each calibrated class probability when every forest probability
+        lies between low and high; isotonic maps are monotone, so the ends suffice"""
+        u_low, u_high = self.isotonic(np.stack([low, high]))
+        if self.n_classes == 2:
+            return np.array([1.0 - u_high[1], u_low[1]]), np.array([1.0 - u_low[1], u_high[1]])
+        # A class is lowest when it is low and the others high, and vice versa
+        low_denominator = u_low + (u_high.sum() - u_high)
+        high_denominator = u_high + (u_low.sum() - u_low)
+        p_low = np.divide(u_low, low_denominator, out=np.zeros_like(u_low), where=low_denominator > 0)
+        p_high = np.divide(u_high, high_denominator, out=np.ones_like(u_high), where=high_denominator > 0)
+        return p_low, p_high
+
+class CompiledModel:
+    """Calibrated bank model that scores preallocated numpy buffers without pandas"""
+
+    def __init__(self, model):
+        if not isinstance(model, CalibratedClassifierCV):
+            raise ValueError("Expected a CalibratedClassifierCV model")
+        first = model.calibrated_classifiers_[0].estimator
+        self.schema = FeatureSchema.from_preprocessor(first.named_steps['preprocessor'])
+        self.classes = model.classes_
+        self.folds = [CompiledFold(cc, self.schema, self.classes) for cc in model.calibrated_classifiers_]
+
+        # Every fold's transformed columns sit side by side so one traversal covers all forests
+        sizes = [fold.n_outputs for fold in self.folds]
+        self.fold_offsets = [int(o) for o in np.r_[0, np.cumsum(sizes)[:-1]]]
+        self.n_inputs = sum(sizes)
+        forests = [cc.estimator.named_steps['classifier'] for cc in model.calibrated_classifiers_]
+        self.trees = ForestArrays(forests, self.fold_offsets)
+        self.output_to_column = np.vstack([fold.output_to_column for fold in self.folds])
+
+        # Early-exit order: interleave the folds so every chunk samples each forest evenly
+        trees = self.trees
+        position = np.concatenate([np.arange(size) / size for size in trees.group_sizes])
+        self.tree_order = np.lexsort((trees.tree_group, position))
+
+    def transform(self, numeric, categorical):
+        """All folds' preprocessor outputs in one matrix"""
+        X = np.zeros((numeric.shape[0], self.n_inputs), dtype=np.float64)
+        for fold, offset in zip(self.folds, self.fold_offsets):
+            fold.transform(numeric, categorical, out=X[:, offset:offset + fold.n_outputs])
+        return X
+
+    def calibrate(self, group_proba):
+        """Mean of each fold's calibrated forest probabilities"""
+        proba = self.folds[0].calibrate(group_proba[:, 0])
+        for i, fold in enumerate(self.folds[1:], start=1):
+            proba += fold.calibrate(group_proba[:, i])
+        return proba / len(self.folds)
+
+    def predict_proba_buffers(self, numeric, categorical):
+        """Calibrated class probabilities for already-filled buffers"""
+        return self.calibrate(self.trees.predict_proba(self.transform(numeric, categorical)))
+
+    def predict_proba(self, data_points):
+        """Calibrated class probabilities for a list of data point dicts"""
+        numeric, categorical = self.schema.encode(data_points)
+        return self.predict_proba_buffers(numeric, categorical)
+
+    def explain_buffers(self, numeric, categorical, class_labels=None):
+        """Calibrated probabilities and fold-averaged path attributions
+
+        Attributions are in forest-probability units (before calibration):
+        bias[c] + contributions[row, :, c].sum() is the folds' mean raw forest
+        probability of class c for that row. Columns follow schema.columns.
+        """
+        class_labels = self.classes if class_labels is None else class_labels
+        classes = np.searchsorted(self.classes, class_labels)
+        group_proba, bias, contrib = self.trees.contributions(self.transform(numeric, categorical), classes)
+        contrib = np.einsum('roc,on->rnc', contrib, self.output_to_column)
+        return self.calibrate(group_proba), bias, contrib
+
+    def top_factors(self, contributions, k=5):
+        """The k schema columns with the largest attribution in one row's contribution vector"""
+        return top_factors(self.schema.columns, contributions, k)
+
+    def explain_one(self, data_point, k=5):
+        """Label, calibrated probabilities and top drivers of the highest-risk class for one data point"""
+        numeric, categorical = self.schema.allocate(1)
+        self.schema.fill(data_point, numeric, categorical)
+        proba, _, contributions = self.explain_buffers(numeric, categorical, self.classes[-1:])
+        return self.classes[np.argmax(proba[0])], proba[0], self.top_factors(contributions[0, :, 0], k)
+
+    def _class_settled(self, sums, counts):
+        """True when no outcome of the unevaluated trees can change the predicted class"""
+        sizes = self.trees.group_sizes[:, np.newaxis]
+        # Each unevaluated tree adds between 0 and 1 to every class
+        low = sums / sizes
+        high = np.minimum((sums + (sizes - counts[:, np.newaxis])) / sizes, 1.0)
+        p_low = p_high = 0
+        for g, fold in enumerate(self.folds):
+            fold_low, fold_high = fold.class_bounds(low[g], high[g])
+            p_low = p_low + fold_low
+            p_high = p_high + fold_high
+        best = np.argmax(p_low)
+        return p_low[best] > np.delete(p_high, best).max()
+
+    def _estimate_converged(self, sums, squares, counts, tolerance):
+        """True when the 95% interval of the high-risk forest probability is within tolerance"""
+        sizes = self.trees.group_sizes
+        mean = sums[:, -1] / counts
+        variance = np.maximum(squares / counts - mean ** 2, 0.0)
+        # Trees are drawn without replacement from each forest
+        correction = (sizes - counts) / np.maximum(sizes - 1, 1)
+        standard_error = np.sqrt((variance / counts * correction).sum()) / len(sizes)
+        return 1.96 * standard_error <= tolerance
+
+    def predict_one_early(self, data_point, mode='class', tolerance=0.01, chunk_size=16):
+        """Class label, probabilities and trees evaluated, stopping once the answer is settled
+
+        Trees run in chunks that start at chunk_size per fold and double, since
+        each traversal has a fixed cost. mode='class' stops when the remaining
+        trees cannot change the calibrated class; mode='tolerance' stops when
+        the high-risk forest probability is estimated within tolerance.
+        Probabilities come from the trees evaluated so far.
+        """
+        if mode not in ('class', 'tolerance'):
+            raise ValueError(f"Unknown early-exit mode '{mode}'")
+        numeric, categorical = self.schema.allocate(1)
+        self.schema.fill(data_point, numeric, categorical)
+        X = self.transform(numeric, categorical)
+
+        trees = self.trees
+        n_groups = len(trees.group_sizes)
+        sums = np.zeros((n_groups, trees.n_classes))
+        squares = np.zeros(n_groups)
+        counts = np.zeros(n_groups)
+        start, step = 0, chunk_size * n_groups
+        while start < trees.n_trees:
+            chunk = self.tree_order[start:start + step]
+            start, step = start + step, step * 2
+            values = trees.value[trees.apply(X, chunk)[0]]
+            group = trees.tree_group[chunk]
+            for c in range(trees.n_classes):
+                sums[:, c] += np.bincount(group, weights=values[:, c], minlength=n_groups)
+            squares += np.bincount(group, weights=values[:, -1] ** 2, minlength=n_groups)
+            counts += np.bincount(group, minlength=n_groups)
+            if start >= trees.n_trees:
+                break
+            if mode == 'class' and self._class_settled(sums, counts):
+                break
+            if mode == 'tolerance' and self._estimate_converged(sums, squares, counts, tolerance):
+                break
+
+        proba = self.calibrate((sums / counts[:, np.newaxis])[np.newaxis])[0]
+        return self.classes[np.argmax(proba)], proba, int(counts.sum())
+
+    def predict_one(self, data_point):
+        """Class label and probabilities for a single data point"""
+        numeric, categorical = self.schema.allocate(1)
+        self.schema.fill(data_point, numeric, categorical)
+        proba = self.predict_proba_buffers(numeric, categorical)[0]
+        return self.classes[np.argmax(proba)], proba
+
+class CompiledRegressor:
+    """Preprocessor plus multi-output RandomForestRegressor pipeline on numpy buffers"""
+
+    def __init__(self, pipeline):
+        if not isinstance(pipeline, Pipeline):
+            raise ValueError("Expected a Pipeline")
+        preprocessor = pipeline.named_steps.get('preprocessor')
+        forest = pipeline.named_steps.get('regressor')
+        if not isinstance(forest, RandomForestRegressor):
+            raise ValueError("Expected a RandomForestRegressor")
+        self.schema = FeatureSchema.from_preprocessor(preprocessor)
+        self.preprocessor = CompiledPreprocessor(preprocessor, self.schema)
+        self.trees = ForestArrays([forest])
+
+    def predict_buffers(self, numeric, categorical):
+        """Forest outputs for already-filled buffers, shape (rows, outputs)"""
+        return self.trees.predict_proba(self.preprocessor.transform(numeric, categorical))[:, 0]
+
+    def predict(self, data_points):
+        """Forest outputs for a list of data point dicts"""
+        numeric, categorical = self.schema.encode(data_points)
+        return self.predict_buffers(numeric, categorical)
+
+    def explain_buffers(self, numeric, categorical, outputs):
+        """Forest outputs plus path attributions of the given outputs on schema columns"""
+        group_values, bias, contrib = self.trees.contributions(self.preprocessor.transform(numeric, categorical), outputs)
+        contrib = np.einsum('roc,on->rnc', contrib, self.preprocessor.output_to_column)
+        return group_values[:, 0], bias, contrib
+
+    def top_factors(self, contributions, k=5):
+        """The k schema columns with the largest attribution in one row's contribution vector"""
+        return top_factors(self.schema.columns, contributions, k)
+
+def release_forests(model):
+    """Drop the fitted trees of a compiled model's forests; returns how many were released
+
+    Works on calibrated bank models and on plain pipelines such as the distilled
+    student's. The model can't predict afterwards, so only call this once its
+    compiled form is what serves it, and never before saving it.
+    """
+    if isinstance(model, CalibratedClassifierCV):
+        forests = [cc.estimator.named_steps.get('classifier') for cc in model.calibrated_classifiers_]
+        # Training hands CalibratedClassifierCV an already fitted pipeline, which it keeps as is
+        if isinstance(model.estimator, Pipeline):
+            forests.append(model.estimator.steps[-1][1])
+    elif isinstance(model, Pipeline):
+        forests = [model.steps[-1][1]]
+    else:
+        forests = []
+    released = 0
+    for forest in forests:
+        if getattr(forest, 'estimators_', None):
+            released += len(forest.estimators_)
+            forest.estimators_ = []
+    return released
+
+def compile_model(model):
+    """CompiledModel for model, or None when its structure is not supported"""
+    if model is None:
+        return None
+    try:
+        return CompiledModel(model)
+    except (ValueError, AttributeError, KeyError, IndexError) as e:
+        print(f"⚠️ Model cannot be compiled, using the DataFrame path: {e}")
+        return None
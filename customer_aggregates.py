@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from feature_schema import NUMERIC_COLUMNS
+
+# Per-customer aggregates of the monthly extract rows, computed for every customer in one groupby.
+# The rules are the ones serving applies to a single customer's rows (aggregate_customer_rows in
+# app.py and the SQLite store's query): numeric means, 0 when a column is all missing; mean credit
+# history years, 5.0 when none parse; majority Payment_of_Min_Amount; most common Occupation.
+
+DEFAULT_CREDIT_HISTORY_YEARS = 5.0
+RISK_LEVELS = {'Good': 0, 'Standard': 1, 'Bad': 2}
+
+def parse_credit_history_years(age_str):
+    """Years from a Credit_History_Age string such as '18 Years and 4 Months', None when unusable"""
+    try:
+        if pd.isna(age_str) or age_str == 'NA':
+            return None
+        parts = str(age_str).split()
+        years = 0
+        months = 0
+        if 'Years' in str(age_str):
+            years = float(parts[0])
+        if 'Months' in str(age_str):
+            months_idx = parts.index('and') + 1 if 'and' in parts else 2
+            if months_idx < len(parts):
+                months = float(parts[months_idx])
+        return years + (months / 12)
+    except:
+        return None
+
+def credit_history_years(values):
+    """parse_credit_history_years for a whole column, parsing each distinct string once"""
+    values = pd.Series(values)
+    uniques = values.dropna().unique()
+    years = {value: parse_credit_history_years(value) for value in uniques}
+    return values.map(years).astype(np.float64)
+
+def mode_per_group(keys, values):
+    """Most common non-missing value per key, ties going to the smallest value as Series.mode does"""
+    counts = pd.DataFrame({'key': keys, 'value': values}).dropna()
+    counts = counts.groupby(['key', 'value']).size().reset_index(name='count')
+    counts = counts.sort_values(['key', 'count', 'value'], ascending=[True, False, True])
+    return counts.drop_duplicates('key').set_index('key')['value']
+
+def aggregate_customers(frame):
+    """One row of serving averages per Customer_ID of frame, indexed by Customer_ID"""
+    ids = frame['Customer_ID'].to_numpy()
+    columns = {col: pd.to_numeric(frame[col], errors='coerce').to_numpy(dtype=np.float64)
+               for col in NUMERIC_COLUMNS if col in frame.columns}
+    if 'Credit_History_Age' in frame.columns:
+        columns['Credit_History_Age_Years'] = credit_history_years(frame['Credit_History_Age']).to_numpy()
+    if 'Payment_of_Min_Amount' in frame.columns:
+        columns['Payment_of_Min_Amount'] = (frame['Payment_of_Min_Amount'] == 'Yes').to_numpy(dtype=np.float64)
+
+    grouped = pd.DataFrame(columns, index=frame.index).groupby(ids)
+    table = grouped.mean()
+    numeric = [col for col in NUMERIC_COLUMNS if col in table.columns]
+    table[numeric] = table[numeric].fillna(0)
+    if 'Credit_History_Age_Years' in table.columns:
+        table['Credit_History_Age_Years'] = table['Credit_History_Age_Years'].fillna(DEFAULT_CREDIT_HISTORY_YEARS)
+    if 'Payment_of_Min_Amount' in table.columns:
+        table['Payment_of_Min_Amount'] = (table['Payment_of_Min_Amount'] > 0.5).astype(int)
+    if 'Occupation' in frame.columns:
+        table['Occupation'] = mode_per_group(ids, frame['Occupation'].to_numpy()).reindex(table.index).fillna('Unknown')
+    table['Rows'] = grouped.size()
+    table.index.name = 'Customer_ID'
+    return table
+
+def customer_averages(table, customer_id):
+    """The averages dict serving uses for one customer, or None when the table lacks them"""
+    if customer_id not in table.index:
+        return None
+    row = table.loc[customer_id]
+    return {col: (row[col].item() if hasattr(row[col], 'item') else row[col]) for col in table.columns if col != 'Rows'}
+
+def customer_training_frame(frame):
+    """Extract-shaped training rows, one per customer, built from the serving aggregates
+
+    The target is each customer's most common risk level. Payment_of_Min_Amount goes back
+    to Yes/No and Credit_History_Age_Years is kept as is, so the usual training
+    preparation applies unchanged.
+    """
+    table = aggregate_customers(frame)
+    if 'Payment_of_Min_Amount' in table.columns:
+        table['Payment_of_Min_Amount'] = np.where(table['Payment_of_Min_Amount'] == 1, 'Yes', 'No')
+    if 'Credit_Mix' in frame.columns:
+        levels = frame['Credit_Mix'].map(RISK_LEVELS).fillna(1).to_numpy()
+        names = {level: name for name, level in RISK_LEVELS.items()}
+        table['Credit_Mix'] = mode_per_group(frame['Customer_ID'].to_numpy(), levels).reindex(table.index).map(names)
+    if 'Source_Bank' in frame.columns:
+        table['Source_Bank'] = frame.groupby('Customer_ID')['Source_Bank'].first().reindex(table.index)
+    return table.drop(columns='Rows').reset_index()
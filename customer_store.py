@@ -0,0 +1,495 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from customer_aggregates import aggregate_customers, customer_averages, parse_credit_history_years
+from feature_schema import NUMERIC_COLUMNS
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 'dataframe' keeps the per-worker bank DataFrames; 'shared' serves customer rows from
+# memory-mapped arrays that every gunicorn worker attaches to read-only; 'sqlite' reads
+# and aggregates them from an indexed database built by scripts/build_customer_db.py
+CUSTOMER_STORE = os.environ.get('CUSTOMER_STORE', 'dataframe')
+CUSTOMER_STORE_DIR = os.environ.get('CUSTOMER_STORE_DIR', os.path.join(
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'loan_risk_customers'))
+CUSTOMER_DB_FILE = os.environ.get('CUSTOMER_DB_FILE', os.path.join('saved_models', 'customers.db'))
+
+# Raw text columns the scoring code reads from a customer's rows
+TEXT_COLUMNS = ['Name', 'Occupation', 'Credit_History_Age', 'Payment_of_Min_Amount']
+MANIFEST_FILE = 'manifest.json'
+# Bank order decides which bank answers for a customer found in several extracts
+BANK_ORDER = ['sb', 'pb', 'fnb', 'bbank']
+INSERT_BATCH_ROWS = 5000
+SIGNATURE_BLOCK_BYTES = 1 << 20
+
+def files_stat_key(paths):
+    """Cheap key of the extract files from each one's path, size and modification time; missing files count too
+
+    Stores keep it next to files_signature, so the extracts are only hashed again
+    when this key changes.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        except OSError:
+            digest.update(f"{path}:missing".encode())
+    return digest.hexdigest()
+
+def files_signature(paths):
+    """Content hash of the bank extract files a customer store is built from; missing files count too"""
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        if not os.path.exists(path):
+            digest.update(b':missing')
+            continue
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(SIGNATURE_BLOCK_BYTES), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+class DataFrameCustomerStore:
+    """Customer lookup over the bank DataFrames held by this process
+
+    Each bank's per-customer averages are aggregated in one groupby the first time
+    the bank answers a lookup, and attached to the customer's rows in
+    attrs['averages'] so scoring doesn't aggregate per request.
+    """
+
+    shared = False
+
+    def __init__(self, datasets):
+        self.datasets = datasets
+        self._averages = {}
+        self._lock = threading.Lock()
+
+    def averages_table(self, name, data):
+        """Per-customer averages for one bank's DataFrame, rebuilt when the DataFrame is reloaded"""
+        cached = self._averages.get(name)
+        if cached is None or cached[0] is not data:
+            with self._lock:
+                cached = self._averages.get(name)
+                if cached is None or cached[0] is not data:
+                    cached = (data, aggregate_customers(data))
+                    self._averages[name] = cached
+        return cached[1]
+
+    def lookup(self, customer_id):
+        """A customer's rows and source bank from the first dataset that has them"""
+        for name, data in self.datasets.items():
+            if not data.empty:
+                customer = data[data['Customer_ID'] == customer_id]
+                if not customer.empty:
+                    averages = customer_averages(self.averages_table(name, data), customer_id)
+                    if averages is not None:
+                        customer.attrs['averages'] = averages
+                    return customer, name.upper()
+        return None, None
+
+    def customer_ids(self, banks=None):
+        """Sorted distinct customer IDs, optionally limited to some banks"""
+        customer_ids = set()
+        for name, data in self.datasets.items():
+            if (banks is None or name in banks) and not data.empty and 'Customer_ID' in data.columns:
+                customer_ids.update(data['Customer_ID'].dropna().unique().tolist())
+        return sorted(customer_ids)
+
+    def averages_frame(self):
+        """Pre-loan averages of every customer as lookup computes them, one row per Customer_ID"""
+        tables = [self.averages_table(name, data) for name, data in self.datasets.items()
+                  if not data.empty and 'Customer_ID' in data.columns]
+        if not tables:
+            return pd.DataFrame()
+        table = pd.concat(tables)
+        # Each customer is answered by the first bank that has them
+        return table[~table.index.duplicated()].drop(columns='Rows')
+
+    def nbytes(self):
+        return int(sum(data.memory_usage(deep=True).sum() for data in self.datasets.values()))
+
+class SharedCustomerStore:
+    """Read-only numpy views of the cleaned customer table in a memory-mapped directory
+
+    Rows are grouped by Customer_ID in their original order, keeping only the
+    bank that DataFrameCustomerStore.lookup would answer from, so a lookup is a
+    binary search over the ID index plus one contiguous slice.
+    """
+
+    shared = True
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.banks = self.manifest['banks']
+        self.numeric_columns = self.manifest['numeric_columns']
+        self.text_columns = self.manifest['text_columns']
+        self.ids = self._attach('ids')
+        self.starts = self._attach('starts')
+        self.source = self._attach('source')
+        self.numeric = self._attach('numeric')
+        self.text = {column: self._attach(f'text_{column}') for column in self.text_columns}
+
+    def _attach(self, name):
+        return np.load(os.path.join(self.directory, f'{name}.npy'), mmap_mode='r')
+
+    def lookup(self, customer_id):
+        """A customer's rows as a small DataFrame and their source bank"""
+        position = int(np.searchsorted(self.ids, str(customer_id)))
+        if position >= len(self.ids) or self.ids[position] != str(customer_id):
+            return None, None
+        rows = slice(int(self.starts[position]), int(self.starts[position + 1]))
+        customer = pd.DataFrame(np.array(self.numeric[rows]), columns=self.numeric_columns)
+        customer.insert(0, 'Customer_ID', str(customer_id))
+        for column in self.text_columns:
+            values = np.array(self.text[column][rows], dtype=object)
+            # Empty strings mark values that were missing in the source data
+            values[values == ''] = np.nan
+            customer[column] = values
+        return customer, self.banks[int(self.source[position])].upper()
+
+    def customer_ids(self, banks=None):
+        """Sorted distinct customer IDs, optionally limited to some banks"""
+        if banks is None:
+            return self.ids.tolist()
+        wanted = np.isin(self.source, [self.banks.index(name) for name in banks if name in self.banks])
+        return self.ids[wanted].tolist()
+
+    def averages_frame(self):
+        """Pre-loan averages of every customer as lookup computes them, one row per Customer_ID"""
+        frame = pd.DataFrame(np.array(self.numeric), columns=self.numeric_columns)
+        frame.insert(0, 'Customer_ID', np.repeat(np.array(self.ids), np.diff(self.starts)))
+        for column in self.text_columns:
+            values = np.array(self.text[column], dtype=object)
+            values[values == ''] = np.nan
+            frame[column] = values
+        return aggregate_customers(frame).drop(columns='Rows')
+
+    def nbytes(self):
+        return int(self.numeric.nbytes + self.ids.nbytes + sum(values.nbytes for values in self.text.values()))
+
+def build_shared_store(datasets, directory, signature, stat_key=None):
+    """Write the cleaned customer table as .npy files, replacing any previous copy"""
+    banks = list(datasets)
+    frames = []
+    for code, name in enumerate(banks):
+        data = datasets[name]
+        if data.empty or 'Customer_ID' not in data.columns:
+            continue
+        frame = pd.DataFrame({'Customer_ID': data['Customer_ID'].astype(str), '_source': code})
+        for column in NUMERIC_COLUMNS:
+            frame[column] = pd.to_numeric(data[column], errors='coerce') if column in data.columns else np.nan
+        for column in TEXT_COLUMNS:
+            frame[column] = data[column].fillna('').astype(str) if column in data.columns else ''
+        frames.append(frame[data['Customer_ID'].notna().values])
+    table = pd.concat(frames, ignore_index=True)
+
+    # Each customer is answered by the first bank that has them
+    winner = table.groupby('Customer_ID')['_source'].transform('min')
+    table = table[table['_source'] == winner]
+    table = table.iloc[np.argsort(table['Customer_ID'].values, kind='stable')]
+    ids, starts = np.unique(table['Customer_ID'].values.astype(str), return_index=True)
+
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=os.path.dirname(directory) or '.')
+    np.save(os.path.join(staging, 'ids.npy'), ids)
+    np.save(os.path.join(staging, 'starts.npy'), np.append(starts, len(table)).astype(np.int64))
+    np.save(os.path.join(staging, 'source.npy'), table['_source'].values[starts].astype(np.int8))
+    np.save(os.path.join(staging, 'numeric.npy'), np.ascontiguousarray(table[NUMERIC_COLUMNS].values, dtype=np.float64))
+    for column in TEXT_COLUMNS:
+        np.save(os.path.join(staging, f'text_{column}.npy'), table[column].values.astype(str))
+    with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+        json.dump({
+            'signature': signature,
+            'stat_key': stat_key,
+            'banks': banks,
+            'rows': len(table),
+            'customers': len(ids),
+            'numeric_columns': NUMERIC_COLUMNS,
+            'text_columns': TEXT_COLUMNS
+        }, f)
+
+    # Workers already attached keep their mapping of the old files until they exit
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.rename(staging, directory)
+
+def _quote(column):
+    return '"' + column + '"'
+
+def build_sqlite_store(frames, path, signature=None, stat_key=None):
+    """Load (bank, DataFrame) chunks into a fresh WAL-mode SQLite database at path
+
+    signature (files_signature of the extracts) is kept in the meta table so a
+    database built from older extracts is noticed and rebuilt; stat_key
+    (files_stat_key) lets an unchanged set of extracts skip the hash.
+    """
+    staging = path + '.building'
+    if os.path.exists(staging):
+        os.remove(staging)
+    connection = sqlite3.connect(staging)
+    connection.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+    connection.executemany('INSERT INTO meta VALUES (?, ?)', [('signature', signature), ('stat_key', stat_key)])
+    numeric = ', '.join(f'{_quote(column)} REAL' for column in NUMERIC_COLUMNS)
+    text = ', '.join(f'{_quote(column)} TEXT' for column in TEXT_COLUMNS)
+    connection.execute(f"""CREATE TABLE customers (
+        Row_ID INTEGER PRIMARY KEY,
+        Customer_ID TEXT NOT NULL,
+        Month TEXT,
+        Source_Bank TEXT NOT NULL,
+        Bank_Order INTEGER NOT NULL,
+        {numeric},
+        {text},
+        Credit_History_Years REAL
+    )""")
+    columns = ['Customer_ID', 'Month', 'Source_Bank', 'Bank_Order'] + NUMERIC_COLUMNS + TEXT_COLUMNS + ['Credit_History_Years']
+    insert = f"INSERT INTO customers ({', '.join(map(_quote, columns))}) VALUES ({', '.join('?' * len(columns))})"
+    rows = 0
+    for bank, data in frames:
+        data = data[data['Customer_ID'].notna()]
+        if data.empty:
+            continue
+        chunk = pd.DataFrame({
+            'Customer_ID': data['Customer_ID'].astype(str),
+            'Month': data['Month'].astype(str) if 'Month' in data.columns else None,
+            'Source_Bank': bank.upper(),
+            'Bank_Order': BANK_ORDER.index(bank) if bank in BANK_ORDER else len(BANK_ORDER)
+        })
+        for column in NUMERIC_COLUMNS:
+            chunk[column] = pd.to_numeric(data[column], errors='coerce') if column in data.columns else np.nan
+        for column in TEXT_COLUMNS:
+            chunk[column] = data[column] if column in data.columns else None
+        chunk['Credit_History_Years'] = chunk['Credit_History_Age'].apply(parse_credit_history_years)
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        for start in range(0, len(chunk), INSERT_BATCH_ROWS):
+            connection.executemany(insert, chunk.iloc[start:start + INSERT_BATCH_ROWS].itertuples(index=False, name=None))
+        rows += len(chunk)
+    connection.execute('CREATE INDEX idx_customers_customer_bank ON customers (Customer_ID, Bank_Order)')
+    connection.execute('CREATE INDEX idx_customers_customer_month ON customers (Customer_ID, Month)')
+    connection.commit()
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('ANALYZE')
+    connection.close()
+    os.replace(staging, path)
+    return rows
+
+class SqliteCustomerStore:
+    """Customer lookups answered by one indexed aggregate query against a SQLite database
+
+    Each worker thread keeps its own read-only connection. lookup returns the
+    customer's first row as a one-row DataFrame with the pre-loan averages in
+    attrs['averages'], so no customer's full history is held in memory.
+    """
+
+    shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        averages = ', '.join(f'AVG({_quote(column)})' for column in NUMERIC_COLUMNS)
+        self.lookup_sql = f"""
+            WITH rows AS (
+                SELECT * FROM customers
+                WHERE Customer_ID = :customer_id
+                  AND Bank_Order = (SELECT MIN(Bank_Order) FROM customers WHERE Customer_ID = :customer_id)
+            ),
+            first_row AS (SELECT * FROM rows ORDER BY Row_ID LIMIT 1)
+            SELECT
+                (SELECT Source_Bank FROM first_row),
+                (SELECT Name FROM first_row),
+                (SELECT Age FROM first_row),
+                (SELECT Occupation FROM first_row),
+                (SELECT Annual_Income FROM first_row),
+                COUNT(*),
+                {averages},
+                AVG(Credit_History_Years),
+                SUM(Payment_of_Min_Amount = 'Yes'),
+                (SELECT Occupation FROM rows WHERE Occupation IS NOT NULL
+                 GROUP BY Occupation ORDER BY COUNT(*) DESC, Occupation LIMIT 1)
+            FROM rows
+        """
+
+    def connection(self):
+        """This thread's read-only connection, reopened after a fork"""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+            local.connection.execute('PRAGMA query_only = ON')
+            local.pid = os.getpid()
+        return local.connection
+
+    def lookup(self, customer_id):
+        """A customer's profile row with their pre-loan averages, and their source bank"""
+        row = self.connection().execute(self.lookup_sql, {'customer_id': str(customer_id)}).fetchone()
+        if row is None or not row[5]:
+            return None, None
+        source, name, age, occupation, annual_income, count = row[:6]
+        means = row[6:6 + len(NUMERIC_COLUMNS)]
+        credit_history, yes_count, occupation_mode = row[6 + len(NUMERIC_COLUMNS):]
+
+        # Same rules as aggregating the rows in pandas
+        averages = {column: mean if mean is not None else 0 for column, mean in zip(NUMERIC_COLUMNS, means)}
+        averages['Credit_History_Age_Years'] = credit_history if credit_history is not None else 5.0
+        averages['Payment_of_Min_Amount'] = 1 if yes_count / count > 0.5 else 0
+        averages['Occupation'] = occupation_mode if occupation_mode is not None else 'Unknown'
+
+        customer = pd.DataFrame([{
+            'Customer_ID': str(customer_id),
+            'Name': name,
+            'Age': age if age is not None else np.nan,
+            'Occupation': occupation,
+            'Annual_Income': annual_income if annual_income is not None else np.nan
+        }])
+        customer.attrs['averages'] = averages
+        return customer, source
+
+    def customer_ids(self, banks=None):
+        """Sorted distinct customer IDs, optionally limited to some banks"""
+        if banks is None:
+            rows = self.connection().execute('SELECT DISTINCT Customer_ID FROM customers ORDER BY Customer_ID')
+        else:
+            placeholders = ', '.join('?' * len(banks))
+            rows = self.connection().execute(
+                f'SELECT DISTINCT Customer_ID FROM customers WHERE Source_Bank IN ({placeholders}) ORDER BY Customer_ID',
+                [bank.upper() for bank in banks])
+        return [customer_id for customer_id, in rows]
+
+    def averages_frame(self):
+        """Pre-loan averages of every customer as lookup computes them, one row per Customer_ID"""
+        columns = ', '.join(f'c.{_quote(column)}' for column in ['Customer_ID'] + NUMERIC_COLUMNS + TEXT_COLUMNS)
+        frame = pd.read_sql_query(f"""
+            SELECT {columns} FROM customers c
+            JOIN (SELECT Customer_ID, MIN(Bank_Order) AS Bank_Order FROM customers GROUP BY Customer_ID) first_bank
+              ON c.Customer_ID = first_bank.Customer_ID AND c.Bank_Order = first_bank.Bank_Order
+            ORDER BY c.Row_ID
+        """, self.connection())
+        return aggregate_customers(frame).drop(columns='Rows')
+
+    def nbytes(self):
+        return os.path.getsize(self.path)
+
+def _manifest_signatures(directory):
+    """(signature, stat_key) a shared table was built with; Nones for a missing or unreadable manifest"""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        return manifest.get('signature'), manifest.get('stat_key')
+    except (OSError, ValueError):
+        return None, None
+
+def _record_manifest_stat_key(directory, stat_key):
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(path) as f:
+        manifest = json.load(f)
+    manifest['stat_key'] = stat_key
+    with open(path + '.writing', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.writing', path)
+
+def _sqlite_signatures(path):
+    """(signature, stat_key) a customer database was built with; Nones for a missing, unreadable or pre-meta database"""
+    if not os.path.exists(path):
+        return None, None
+    try:
+        connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta WHERE key IN ('signature', 'stat_key')"))
+        finally:
+            connection.close()
+        return meta.get('signature'), meta.get('stat_key')
+    except sqlite3.Error:
+        return None, None
+
+def _record_sqlite_stat_key(path, stat_key):
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("INSERT OR REPLACE INTO meta VALUES ('stat_key', ?)", (stat_key,))
+        connection.commit()
+    finally:
+        connection.close()
+
+def _stale_signature(stored, sources, stat_key, record_stat_key):
+    """None while a store built with stored (signature, stat_key) still matches sources, else the new signature
+
+    Unchanged file stats skip hashing. When only the stats moved (a touched or
+    copied extract) the contents decide, and a match records the new stat key.
+    """
+    signature, stored_stat_key = stored
+    if signature is not None and stored_stat_key == stat_key:
+        return None
+    current = files_signature(sources)
+    if signature == current:
+        record_stat_key(stat_key)
+        return None
+    return current
+
+def open_customer_store(datasets, mode=CUSTOMER_STORE, directory=CUSTOMER_STORE_DIR, sources=()):
+    """Customer store for this process; the shared table is built once and reused by every worker
+
+    sources are the extract files behind datasets, which the shared table and the SQLite
+    database are checked against, so datasets are only loaded when a store is (re)built.
+    """
+    if mode == 'sqlite':
+        return open_sqlite_store(datasets, sources=sources)
+    if mode != 'shared':
+        return DataFrameCustomerStore(datasets)
+    try:
+        os.makedirs(os.path.dirname(directory) or '.', exist_ok=True)
+        stat_key = files_stat_key(sources)
+        with open(directory + '.lock', 'w') as lock:
+            # The first worker builds the table while the others wait, then everyone attaches
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            signature = _stale_signature(_manifest_signatures(directory), sources, stat_key,
+                                        partial(_record_manifest_stat_key, directory))
+            if signature is not None:
+                print(f"🔄 Building shared customer table in {directory}...")
+                build_shared_store(datasets, directory, signature, stat_key)
+            store = SharedCustomerStore(directory)
+        print(f"📁 Shared customer table attached: {store.manifest['customers']} customers, "
+              f"{store.manifest['rows']} rows, {store.nbytes() / (1024 * 1024):.2f} MB mapped from {directory}")
+        return store
+    except Exception as e:
+        print(f"✗ Shared customer table unavailable ({e}); using per-worker DataFrames")
+        return DataFrameCustomerStore(datasets)
+
+def open_sqlite_store(datasets, path=CUSTOMER_DB_FILE, sources=()):
+    """SqliteCustomerStore, (re)building the database from the loaded datasets when it is missing or stale
+
+    The database is stale when it was built from different extract files than
+    sources, so edited or re-exported extracts are never served from an old copy.
+    """
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        stat_key = files_stat_key(sources)
+        with open(path + '.lock', 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if not os.path.exists(path):
+                print(f"🔄 No customer database at {path}, building it from the loaded datasets...")
+                build_sqlite_store(datasets.items(), path, files_signature(sources), stat_key)
+            else:
+                signature = _stale_signature(_sqlite_signatures(path), sources, stat_key,
+                                            partial(_record_sqlite_stat_key, path))
+                if signature is not None:
+                    print(f"⚠️ Customer database {path} was not built from the current extracts, rebuilding it...")
+                    build_sqlite_store(datasets.items(), path, signature, stat_key)
+        store = SqliteCustomerStore(path)
+        print(f"📁 Customer database attached: {path} ({store.nbytes() / (1024 * 1024):.2f} MB)")
+        return store
+    except Exception as e:
+        print(f"✗ Customer database unavailable ({e}); using per-worker DataFrames")
+        return DataFrameCustomerStore(datasets)
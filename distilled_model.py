@@ -0,0 +1,89 @@
+import os
+
+import joblib
+import numpy as np
+
+# The distilled student answers for every bank when its artifact exists and is faithful enough; teachers stay loaded for audit
+SERVE_STUDENT = os.environ.get('SERVE_STUDENT', '1') == '1'
+STUDENT_MODEL_FILE = os.environ.get('STUDENT_MODEL_FILE', os.path.join('saved_models', 'bank_student.pkl'))
+# A student is only served when every bank's held-out level agreement with its teacher, measured on
+# served inputs by scripts/distill_bank_models.py, reaches this
+STUDENT_MIN_LEVEL_AGREEMENT = float(os.environ.get('STUDENT_MIN_LEVEL_AGREEMENT', '0.95'))
+
+class DistilledModel:
+    """Multi-output student forest reproducing each teacher bank's calibrated probabilities"""
+
+    def __init__(self, model, banks, classes, metadata=None):
+        self.model = model
+        self.banks = list(banks)
+        self.classes = np.asarray(classes)
+        self.n_classes = len(self.classes)
+        self.metadata = metadata or {}
+        # Deferred so importing this module does not pull in scikit-learn
+        from compiled_model import CompiledRegressor
+        self.compiled = CompiledRegressor(model)
+
+    def high_risk_outputs(self):
+        """Output column of each bank's highest risk class"""
+        return [b * self.n_classes + self.n_classes - 1 for b in range(len(self.banks))]
+
+    def normalise(self, outputs):
+        """Regression outputs as per-bank probability vectors, shape (rows, banks, classes)"""
+        proba = np.clip(outputs, 0.0, None).reshape(len(outputs), len(self.banks), self.n_classes)
+        total = proba.sum(axis=2, keepdims=True)
+        uniform = np.full_like(proba, 1 / self.n_classes)
+        return np.divide(proba, total, out=uniform, where=total > 0)
+
+    def predict_proba(self, data_points):
+        """Every bank's class probabilities for a list of data point dicts"""
+        return self.normalise(self.compiled.predict(data_points))
+
+    def explain_one(self, data_point, k=5):
+        """Per-bank probabilities for one data point and each bank's top high-risk drivers"""
+        numeric, categorical = self.compiled.schema.allocate(1)
+        self.compiled.schema.fill(data_point, numeric, categorical)
+        proba, factors = self.explain_buffers(numeric, categorical, k)
+        return proba[0], factors[0]
+
+    def explain_batch(self, data_points, k=5):
+        """explain_one for a list of data point dicts, traversing the trees once for all of them"""
+        numeric, categorical = self.compiled.schema.encode(data_points)
+        return self.explain_buffers(numeric, categorical, k)
+
+    def explain_buffers(self, numeric, categorical, k=5):
+        outputs, _, contributions = self.compiled.explain_buffers(numeric, categorical, self.high_risk_outputs())
+        factors = [{bank: self.compiled.top_factors(contributions[row, :, b], k) for b, bank in enumerate(self.banks)}
+                   for row in range(len(outputs))]
+        return self.normalise(outputs), factors
+
+def fidelity_problem(metadata, banks, min_agreement=STUDENT_MIN_LEVEL_AGREEMENT):
+    """Why a student's fidelity report rules it out of serving, or None when it qualifies"""
+    if metadata.get('evaluation', {}).get('inputs') != 'served':
+        return "its fidelity was not measured on served inputs; retrain it with scripts/distill_bank_models.py"
+    fidelity = metadata.get('fidelity', {})
+    for bank in banks:
+        agreement = fidelity.get(bank, {}).get('level_agreement', 0.0)
+        if agreement < min_agreement:
+            return f"{bank.upper()} level agreement {agreement:.1%} is below STUDENT_MIN_LEVEL_AGREEMENT ({min_agreement:.1%})"
+    return None
+
+def load_student(path=STUDENT_MODEL_FILE):
+    """DistilledModel from a saved artifact, or None when it is missing, unreadable or not faithful enough"""
+    if not os.path.exists(path):
+        return None
+    try:
+        artifact = joblib.load(path)
+        problem = fidelity_problem(artifact.get('metadata') or {}, artifact['banks'])
+        if problem:
+            print(f"⚠️ Distilled student at {path} not served, {problem}; the bank models answer instead")
+            return None
+        student = DistilledModel(artifact['model'], artifact['banks'], artifact['classes'], artifact.get('metadata'))
+        from compiled_model import RELEASE_COMPILED_FORESTS, release_forests
+        if RELEASE_COMPILED_FORESTS:
+            # Serving reads only the compiled arrays
+            release_forests(student.model)
+        print(f"📁 Distilled student loaded from {path} (answers for {', '.join(b.upper() for b in student.banks)})")
+        return student
+    except Exception as e:
+        print(f"✗ Error loading distilled student from {path}: {e}")
+        return None
@@ -0,0 +1,71 @@
+import numpy as np
+
+# Raw numeric columns of the bank extracts
+NUMERIC_COLUMNS = ['Age', 'Annual_Income', 'Monthly_Inhand_Salary', 'Num_Bank_Accounts',
+                   'Num_Credit_Card', 'Interest_Rate', 'Num_of_Loan', 'Delay_from_due_date',
+                   'Num_of_Delayed_Payment', 'Changed_Credit_Limit', 'Num_Credit_Inquiries',
+                   'Outstanding_Debt', 'Credit_Utilization_Ratio', 'Total_EMI_per_month',
+                   'Amount_invested_monthly', 'Monthly_Balance']
+
+# Model inputs: raw numeric columns plus the two derived ones
+NUMERIC_FEATURES = NUMERIC_COLUMNS + ['Credit_History_Age_Years', 'Payment_of_Min_Amount']
+CATEGORICAL_FEATURES = ['Occupation']
+BBANK_CATEGORICAL_FEATURES = ['Occupation', 'Source_Bank']
+
+# Values used when a data point lacks a feature
+NUMERIC_DEFAULT = 0
+CATEGORICAL_DEFAULTS = {
+    'Occupation': 'Unknown',
+    'Source_Bank': 'COMBINED'
+}
+
+class FeatureSchema:
+    """Column order and defaults for one model, resolved once"""
+
+    def __init__(self, numeric_features, categorical_features):
+        self.numeric_features = list(numeric_features)
+        self.categorical_features = list(categorical_features)
+        self.columns = self.numeric_features + self.categorical_features
+        self.numeric_defaults = np.full(len(self.numeric_features), NUMERIC_DEFAULT, dtype=np.float64)
+        self.categorical_defaults = [CATEGORICAL_DEFAULTS.get(col, 'Unknown') for col in self.categorical_features]
+
+    @classmethod
+    def for_model_name(cls, model_name):
+        """Schema the serving code has always assumed for a bank model"""
+        if model_name.upper() in ('B-BANK', 'BBANK'):
+            return cls(NUMERIC_FEATURES, BBANK_CATEGORICAL_FEATURES)
+        return cls(NUMERIC_FEATURES, CATEGORICAL_FEATURES)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """Schema matching the columns a fitted ColumnTransformer selects"""
+        numeric, categorical = [], []
+        for name, _, columns in preprocessor.transformers_:
+            if name == 'num':
+                numeric = list(columns)
+            elif name == 'cat':
+                categorical = list(columns)
+        return cls(numeric, categorical)
+
+    def allocate(self, n_rows=1):
+        """Preallocated input buffers for n_rows data points"""
+        numeric = np.empty((n_rows, len(self.numeric_features)), dtype=np.float64)
+        categorical = np.empty((n_rows, len(self.categorical_features)), dtype=object)
+        return numeric, categorical
+
+    def fill(self, data_point, numeric, categorical, row=0):
+        """Write one data point's features (or their defaults) into the buffers"""
+        numeric[row] = self.numeric_defaults
+        for i, feature in enumerate(self.numeric_features):
+            value = data_point.get(feature)
+            if value is not None:
+                numeric[row, i] = value
+        for i, feature in enumerate(self.categorical_features):
+            categorical[row, i] = data_point.get(feature, self.categorical_defaults[i])
+
+    def encode(self, data_points):
+        """Buffers holding a list of data points, one row each"""
+        numeric, categorical = self.allocate(len(data_points))
+        for row, data_point in enumerate(data_points):
+            self.fill(data_point, numeric, categorical, row)
+        return numeric, categorical
@@ -0,0 +1,89 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Coalescing window and batch cap; a window of 0 disables micro-batching
+INFERENCE_BATCH_WINDOW_MS = float(os.environ.get('INFERENCE_BATCH_WINDOW_MS', 0))
+INFERENCE_BATCH_MAX_ROWS = int(os.environ.get('INFERENCE_BATCH_MAX_ROWS', 64))
+
+class MicroBatchScheduler:
+    """Coalesce concurrent single-row requests into one batch call per key
+
+    submit(key, item) returns a Future. A worker thread waits for the first
+    pending item, keeps collecting for window_ms (or until max_rows items are
+    queued), then calls batch_fn(key, items) once per key and resolves each
+    Future with the matching element of the returned list.
+    """
+
+    def __init__(self, batch_fn, window_ms=INFERENCE_BATCH_WINDOW_MS, max_rows=INFERENCE_BATCH_MAX_ROWS):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_rows = max(1, max_rows)
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        # Started lazily so forked server workers each get their own thread
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='micro-batch-scheduler', daemon=True)
+                    self._worker.start()
+
+    def submit(self, key, item):
+        """Queue one item for the next batch of key; returns a Future of its result"""
+        future = Future()
+        self._ensure_worker()
+        self.pending.put((key, item, future))
+        return future
+
+    def _collect(self):
+        """Block for the first request, then gather more until the window closes or the batch is full"""
+        batch = [self.pending.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Anything already queued rides along without waiting
+        while len(batch) < self.max_rows:
+            try:
+                batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            groups = {}
+            for key, item, future in batch:
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(key, []).append((item, future))
+            for key, entries in groups.items():
+                try:
+                    results = self.batch_fn(key, [item for item, _ in entries])
+                    for (_, future), result in zip(entries, results):
+                        future.set_result(result)
+                except Exception as e:
+                    for _, future in entries:
+                        future.set_exception(e)
+                self.batches += 1
+                self.rows += len(entries)
+
+    def stats(self):
+        """Batches run, rows scored and the mean batch size so far"""
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_rows': self.rows / self.batches if self.batches else 0.0
+        }
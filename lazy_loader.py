@@ -0,0 +1,62 @@
+import threading
+import time
+from collections.abc import Mapping
+
+class LazyRegistry(Mapping):
+    """Read-only mapping whose values are produced by a per-key loader on first access
+
+    Each key has its own lock, so concurrent requests for one bank wait for a
+    single load while other banks stay available. A loader that raises or
+    returns None leaves the key 'unavailable' rather than retrying per request.
+    """
+
+    def __init__(self, loaders, label):
+        self.loaders = dict(loaders)
+        self.label = label
+        self._values = {}
+        self._states = {key: 'pending' for key in self.loaders}
+        self._seconds = {}
+        self._locks = {key: threading.Lock() for key in self.loaders}
+
+    def __getitem__(self, key):
+        if key in self._values:
+            return self._values[key]
+        loader = self.loaders[key]
+        with self._locks[key]:
+            if key not in self._values:
+                self._states[key] = 'loading'
+                t0 = time.perf_counter()
+                try:
+                    value = loader()
+                except Exception as e:
+                    print(f"✗ Error loading {key.upper()} {self.label}: {e}")
+                    value = None
+                self._seconds[key] = time.perf_counter() - t0
+                self._values[key] = value
+                self._states[key] = 'loaded' if value is not None else 'unavailable'
+        return self._values[key]
+
+    def __contains__(self, key):
+        # Membership must not trigger a load
+        return key in self.loaders
+
+    def __iter__(self):
+        return iter(self.loaders)
+
+    def __len__(self):
+        return len(self.loaders)
+
+    def is_settled(self, key):
+        """True once the key's load has finished, successfully or not"""
+        return key in self._values
+
+    def release(self, key):
+        """Drop a loaded value; the next access loads it again"""
+        with self._locks[key]:
+            self._values.pop(key, None)
+            self._states[key] = 'pending'
+
+    def status(self):
+        """State and load time of every key"""
+        return {key: {'state': self._states[key], 'seconds': round(self._seconds[key], 3) if key in self._seconds else None}
+                for key in self.loaders}
@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+
+# Precomputed scores for every customer at standard loan amounts, so /process answers the common
+# case with a lookup; off-grid amounts and audit requests are scored live. Opt-in: every worker
+# builds its own table in the background at boot and after each reload
+MATERIALIZED_SCORES = os.environ.get('MATERIALIZED_SCORES', '0') == '1'
+LOAN_AMOUNT_GRID = [float(amount) for amount in
+                    os.environ.get('LOAN_AMOUNT_GRID', '5000,10000,25000,50000,100000,250000').split(',') if amount.strip()]
+MATERIALIZE_BATCH_CUSTOMERS = int(os.environ.get('MATERIALIZE_BATCH_CUSTOMERS', 256))
+
+CONFIDENCE_CODES = ['High', 'Medium', 'Low']
+STATUS_CODES = ['ok', 'unavailable', 'error']
+
+class ScoreTable:
+    """Every bank's score for every customer at each grid loan amount, in flat numpy arrays
+
+    Customers are found by binary search over the sorted IDs and amounts by exact
+    match, so a lookup is a few array reads. Each cell keeps the score dict's
+    fields as small codes, plus up to k (feature, contribution) driver pairs with
+    features stored as indexes into a shared name list.
+    """
+
+    def __init__(self, customer_ids, amounts, banks, k, scored_by=None, sources=()):
+        self.customer_ids = np.array(sorted(customer_ids), dtype=str)
+        self.amounts = {float(amount): column for column, amount in enumerate(amounts)}
+        self.banks = list(banks)
+        self.k = k
+        self.scored_by = scored_by
+        # Objects the scores were computed from; the table is stale once any of them is replaced
+        self.sources = tuple(sources)
+        shape = (len(self.banks), len(self.customer_ids), len(self.amounts))
+        self.filled = np.zeros(shape[1:], dtype=bool)
+        self.level = np.zeros(shape, dtype=np.int8)
+        self.pct = np.zeros(shape, dtype=np.float32)
+        self.confidence = np.zeros(shape, dtype=np.int8)
+        self.status = np.zeros(shape, dtype=np.int8)
+        self.trees = np.full(shape, -1, dtype=np.int32)
+        self.factor_feature = np.full(shape + (k,), -1, dtype=np.int16)
+        self.factor_value = np.zeros(shape + (k,), dtype=np.float32)
+        self.features = []
+        self._feature_index = {}
+
+    def row(self, customer_id):
+        """Row of a customer ID, or None when the table doesn't have them"""
+        row = int(np.searchsorted(self.customer_ids, customer_id))
+        if row < len(self.customer_ids) and self.customer_ids[row] == customer_id:
+            return row
+        return None
+
+    def feature_code(self, feature):
+        if feature not in self._feature_index:
+            self._feature_index[feature] = len(self.features)
+            self.features.append(feature)
+        return self._feature_index[feature]
+
+    def set(self, row, column, scores):
+        """Store one customer's per-bank score dicts at one grid amount"""
+        for b, bank in enumerate(self.banks):
+            score = scores[bank]
+            self.level[b, row, column] = score['level']
+            self.pct[b, row, column] = score['pct']
+            self.confidence[b, row, column] = CONFIDENCE_CODES.index(score['confidence'])
+            self.status[b, row, column] = STATUS_CODES.index(score['status'])
+            self.trees[b, row, column] = score['trees'] if score['trees'] is not None else -1
+            for i, (feature, contribution) in enumerate(score['factors'][:self.k]):
+                self.factor_feature[b, row, column, i] = self.feature_code(feature)
+                self.factor_value[b, row, column, i] = contribution
+        self.filled[row, column] = True
+
+    def lookup(self, customer_id, loan_amount):
+        """Per-bank score dicts as score_all_banks returns them, or None off the grid"""
+        column = self.amounts.get(float(loan_amount))
+        row = self.row(customer_id) if column is not None else None
+        if row is None or not self.filled[row, column]:
+            return None
+        scores = {}
+        for b, bank in enumerate(self.banks):
+            trees = int(self.trees[b, row, column])
+            scores[bank] = {
+                'level': int(self.level[b, row, column]),
+                'pct': round(float(self.pct[b, row, column]), 2),
+                'confidence': CONFIDENCE_CODES[self.confidence[b, row, column]],
+                'status': STATUS_CODES[self.status[b, row, column]],
+                'factors': [(self.features[code], round(float(value), 2))
+                            for code, value in zip(self.factor_feature[b, row, column], self.factor_value[b, row, column])
+                            if code >= 0],
+                'trees': trees if trees >= 0 else None
+            }
+        return scores
+
+    def is_current(self, sources):
+        """True while every object the scores came from is still the one in use"""
+        return len(sources) == len(self.sources) and all(a is b for a, b in zip(sources, self.sources))
+
+    def nbytes(self):
+        arrays = [self.customer_ids, self.filled, self.level, self.pct, self.confidence, self.status,
+                  self.trees, self.factor_feature, self.factor_value]
+        return int(sum(array.nbytes for array in arrays))
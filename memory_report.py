@@ -0,0 +1,175 @@
+import os
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+# Log the memory report once the banks are warm, so each worker's footprint shows up in its startup log
+MEMORY_REPORT_ON_STARTUP = os.environ.get('MEMORY_REPORT_ON_STARTUP', '1') == '1'
+
+SMAPS_ROLLUP = '/proc/self/smaps_rollup'
+PROC_STATUS = '/proc/self/status'
+
+# Objects the size walk never descends into: code and types are shared by every worker anyway
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+def _is_sklearn_tree(obj):
+    """True for the compiled Tree behind a fitted decision tree, whose arrays sys.getsizeof can't see"""
+    return type(obj).__module__.startswith('sklearn.tree') and hasattr(obj, 'node_count')
+
+def deep_size(obj, seen=None):
+    """Bytes held by obj and everything it references, each object counted once
+
+    numpy arrays count their buffers (a view counts its base), DataFrames their
+    deep memory_usage, and scikit-learn trees their node and value arrays.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, _SKIPPED_TYPES):
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        # getsizeof includes the buffer only when the array owns it
+        return sys.getsizeof(obj) + (deep_size(obj.base, seen) if obj.base is not None else 0)
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if _is_sklearn_tree(obj):
+        state = obj.__getstate__()
+        return sys.getsizeof(obj) + state['nodes'].nbytes + state['values'].nbytes
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += deep_size(vars(obj), seen)
+    return size
+
+def forest_summary(forest):
+    """Tree count, node count and bytes of one fitted forest"""
+    return {
+        'trees': len(forest.estimators_),
+        'nodes': int(sum(estimator.tree_.node_count for estimator in forest.estimators_)),
+        'bytes': deep_size(forest.estimators_)
+    }
+
+def model_summary(model):
+    """Bytes of a loaded model split into trees, calibrators and preprocessing, with tree and node counts
+
+    Handles the calibrated pipelines the banks serve and the distilled student
+    (whose .model is a plain pipeline); anything else is reported by total size only.
+    """
+    summary = {'type': type(model).__name__, 'bytes': deep_size(model)}
+    pipelines, calibrators = [], []
+    if hasattr(model, 'calibrated_classifiers_'):
+        for fold in model.calibrated_classifiers_:
+            pipelines.append(fold.estimator)
+            calibrators.extend(fold.calibrators)
+        summary['folds'] = len(model.calibrated_classifiers_)
+    elif hasattr(getattr(model, 'model', None), 'named_steps'):
+        pipelines.append(model.model)
+    elif hasattr(model, 'named_steps'):
+        pipelines.append(model)
+
+    # Forests whose trees were released after compiling have no estimators left to count
+    forests = [pipeline.steps[-1][1] for pipeline in pipelines if getattr(pipeline.steps[-1][1], 'estimators_', None)]
+    if forests:
+        forest_stats = [forest_summary(forest) for forest in forests]
+        summary['trees'] = sum(stats['trees'] for stats in forest_stats)
+        summary['nodes'] = sum(stats['nodes'] for stats in forest_stats)
+        summary['tree_bytes'] = sum(stats['bytes'] for stats in forest_stats)
+        summary['preprocessor_bytes'] = deep_size([pipeline.steps[0][1] for pipeline in pipelines])
+    if calibrators:
+        summary['calibrators'] = len(calibrators)
+        summary['calibrator_bytes'] = deep_size(calibrators)
+    if hasattr(model, 'compiled'):
+        summary['compiled'] = compiled_summary(model.compiled)
+    return summary
+
+def compiled_summary(compiled):
+    """Tree count, node count and bytes of a compiled model's flattened forests"""
+    return {'trees': int(compiled.trees.n_trees), 'nodes': int(len(compiled.trees.feature)), 'bytes': deep_size(compiled)}
+
+def dataframe_summary(data):
+    """Shape and deep bytes of a dataset DataFrame"""
+    return {'rows': len(data), 'columns': data.shape[1], 'bytes': int(data.memory_usage(deep=True).sum())}
+
+def _read_kb_fields(path):
+    """'Name: N kB' lines of a /proc file as {name: bytes}"""
+    fields = {}
+    with open(path) as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            parts = value.split()
+            if len(parts) == 2 and parts[1] == 'kB':
+                fields[name] = int(parts[0]) * 1024
+    return fields
+
+def process_memory():
+    """Resident, proportional, shared and private bytes of this process
+
+    Shared pages (copy-on-write model pages after a fork, the memory-mapped
+    customer store) are what extra workers don't pay for again; private pages
+    are the per-worker cost. Falls back to RSS alone without smaps_rollup.
+    """
+    try:
+        fields = _read_kb_fields(SMAPS_ROLLUP)
+        return {
+            'source': 'smaps_rollup',
+            'rss_bytes': fields.get('Rss', 0),
+            'pss_bytes': fields.get('Pss', 0),
+            'shared_bytes': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+            'private_bytes': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+            'anonymous_bytes': fields.get('Anonymous', 0),
+            'swap_bytes': fields.get('Swap', 0)
+        }
+    except OSError:
+        pass
+    try:
+        return {'source': 'status', 'rss_bytes': _read_kb_fields(PROC_STATUS).get('VmRSS', 0)}
+    except OSError:
+        import resource
+        # Peak rather than current RSS; kB on Linux, bytes on macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return {'source': 'getrusage', 'rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale}
+
+def to_mb(value):
+    """A report with every 'bytes' / '*_bytes' field renamed to 'mb' / '*_mb' and converted, recursively"""
+    if not isinstance(value, dict):
+        return value
+    converted = {}
+    for key, item in value.items():
+        if key == 'bytes' or key.endswith('_bytes'):
+            converted[key[:-len('bytes')] + 'mb'] = round(item / 1024 ** 2, 2)
+        else:
+            converted[key] = to_mb(item)
+    return converted
+
+def format_memory_report(report):
+    """Startup log lines for a memory report built by the app"""
+    lines = []
+    for name, bank in report['banks'].items():
+        dataset, model = bank['dataset'], bank['model']
+        data_text = f"{dataset['bytes'] / 1024 ** 2:.1f} MB ({dataset['rows']} rows)" if 'bytes' in dataset else dataset['state']
+        if 'bytes' in model:
+            model_text = f"{model['bytes'] / 1024 ** 2:.1f} MB"
+            if 'trees' in model:
+                model_text += f" ({model['trees']} trees, {model['nodes']} nodes)"
+            if 'compiled' in bank:
+                compiled = bank['compiled']
+                model_text += (f" + {compiled['bytes'] / 1024 ** 2:.1f} MB compiled "
+                               f"({compiled['trees']} trees, {compiled['nodes']} nodes)")
+        else:
+            model_text = model['state']
+        lines.append(f"📋 {name.upper()}: data {data_text}, model {model_text}")
+    for label in ('student', 'customer_store', 'score_table'):
+        part = report.get(label)
+        if part and 'bytes' in part:
+            lines.append(f"📋 {label.replace('_', ' ').capitalize()}: {part['bytes'] / 1024 ** 2:.1f} MB")
+    process = report['process']
+    text = f"💾 Process RSS {process['rss_bytes'] / 1024 ** 2:.0f} MB, accounted for {report['accounted_bytes'] / 1024 ** 2:.0f} MB"
+    if 'shared_bytes' in process:
+        text += f" (shared {process['shared_bytes'] / 1024 ** 2:.0f} MB, private {process['private_bytes'] / 1024 ** 2:.0f} MB)"
+    lines.append(text)
+    return lines
@@ -0,0 +1,56 @@
+import os
+
+import joblib
+
+# Compression for saved model artifacts: 'none' or CODEC[:LEVEL] with a joblib codec (zlib, gzip, bz2,
+# lzma, xz, lz4). joblib.load detects the codec from the file, so loading needs no setting
+MODEL_COMPRESSION = os.environ.get('MODEL_COMPRESSION', 'none')
+
+CODECS = ('zlib', 'gzip', 'bz2', 'lzma', 'xz', 'lz4')
+DEFAULT_LEVEL = 3
+
+# lz4 is optional; without it lz4 artifacts are written with zlib instead
+try:
+    import lz4
+except ImportError:
+    lz4 = None
+
+def parse_compression(spec):
+    """joblib's compress argument for a 'none' / CODEC[:LEVEL] setting"""
+    spec = (spec or 'none').strip().lower()
+    if spec in ('none', '0', ''):
+        return 0
+    codec, _, level = spec.partition(':')
+    if codec not in CODECS:
+        raise ValueError(f"Unknown model compression '{spec}', expected 'none' or one of {', '.join(CODECS)}")
+    level = int(level) if level else DEFAULT_LEVEL
+    if not 0 <= level <= 9:
+        raise ValueError(f"Compression level must be 0-9, got {level}")
+    return (codec, level) if level else 0
+
+def codec_available(compress):
+    """False for an lz4 setting when the lz4 package isn't installed"""
+    return not (compress and compress[0] == 'lz4' and lz4 is None)
+
+def save_model(model, path, compression=None):
+    """Write a model artifact atomically with the configured compression
+
+    Returns its size in bytes and the label of the codec actually used, which
+    differs from the setting when lz4 falls back to zlib.
+    """
+    compress = parse_compression(MODEL_COMPRESSION if compression is None else compression)
+    if not codec_available(compress):
+        print(f"⚠️ lz4 is not installed, saving {path} with zlib level {compress[1]}")
+        compress = ('zlib', compress[1])
+    staging = f'{path}.{os.getpid()}.writing'
+    joblib.dump(model, staging, compress=compress)
+    os.replace(staging, path)
+    return os.path.getsize(path), compression_label(compress)
+
+def compression_label(compress):
+    """Short label of a joblib compress argument for logs, e.g. 'zlib:3' or 'uncompressed'"""
+    return f'{compress[0]}:{compress[1]}' if compress else 'uncompressed'
+
+def describe_compression(compression=None):
+    """Label of a compression setting, defaulting to MODEL_COMPRESSION"""
+    return compression_label(parse_compression(MODEL_COMPRESSION if compression is None else compression))
@@ -0,0 +1,130 @@
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# Opt-in request profiling: a sample of requests, or ones carrying the admin token in the
+# profile header, run under a stack sampler whose folded output feeds flamegraph.pl or speedscope
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 1))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'loan_risk_profiles'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 50))
+PROFILE_HEADER = 'X-Profile'
+
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+def frame_label(code):
+    """Stack frame name as function (package/module.py:line), without the folded format's separators"""
+    path = code.co_filename.replace('\\', '/').split('/')
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})".replace(';', ':').replace(' ', '_')
+
+def fold_stack(frame):
+    """One sampled stack, outermost frame first, joined the way folded-stack tools expect"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+# Samplers running now and the interpreter switch interval to restore when the last one stops
+_active = {'count': 0, 'switch_interval': None}
+_active_lock = threading.Lock()
+
+class StackSampler:
+    """Samples one thread's Python stack from a timer thread and counts the folded stacks
+
+    The profiled thread runs unmodified; the sampler only reads its current frame
+    every interval, so the cost is one short wake-up per sample. The interpreter's
+    GIL switch interval (5 ms by default) is shortened while any sampler runs,
+    otherwise the sampler could not wake up more often than that.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[fold_stack(frame)] += 1
+
+    def start(self):
+        with _active_lock:
+            if not _active['count']:
+                _active['switch_interval'] = sys.getswitchinterval()
+                sys.setswitchinterval(min(_active['switch_interval'], self.interval / 2))
+            _active['count'] += 1
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        with _active_lock:
+            _active['count'] -= 1
+            if not _active['count']:
+                sys.setswitchinterval(_active['switch_interval'])
+        return self.counts
+
+def valid_request_id(request_id):
+    return bool(request_id) and REQUEST_ID_PATTERN.match(request_id) is not None
+
+def profile_path(request_id, directory=PROFILE_DIR):
+    """Folded-stack file of a profile, or None for an ID that could escape the directory"""
+    return os.path.join(directory, f'{request_id}.folded') if valid_request_id(request_id) else None
+
+def save_profile(request_id, counts, metadata, directory=PROFILE_DIR, keep=PROFILE_KEEP):
+    """Write a profile's folded stacks and metadata, then drop all but the newest keep profiles"""
+    os.makedirs(directory, exist_ok=True)
+    path = profile_path(request_id, directory)
+    for target, content in ((path, ''.join(f'{stack} {count}\n' for stack, count in counts.most_common())),
+                            (path[:-len('.folded')] + '.json', json.dumps(metadata))):
+        staging = f'{target}.{os.getpid()}.writing'
+        with open(staging, 'w') as f:
+            f.write(content)
+        os.replace(staging, target)
+    for stale in list_profiles(directory)[keep:]:
+        for suffix in ('.folded', '.json'):
+            try:
+                os.remove(os.path.join(directory, stale['request_id'] + suffix))
+            except FileNotFoundError:
+                pass
+
+def list_profiles(directory=PROFILE_DIR):
+    """Metadata of the stored profiles, newest first"""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return sorted(profiles, key=lambda profile: profile.get('started_at', 0), reverse=True)
+
+def profile_call(request_id, function, metadata, interval_ms=PROFILE_INTERVAL_MS, directory=PROFILE_DIR):
+    """Run function() on this thread under the sampler and store its profile; returns function's result"""
+    sampler = StackSampler(threading.get_ident(), interval_ms / 1000).start()
+    started_at = time.time()
+    t0 = time.perf_counter()
+    try:
+        return function()
+    finally:
+        counts = sampler.stop()
+        metadata = dict(metadata, request_id=request_id, started_at=started_at,
+                        duration_ms=round((time.perf_counter() - t0) * 1000, 2),
+                        samples=sum(counts.values()), interval_ms=interval_ms)
+        try:
+            save_profile(request_id, counts, metadata, directory)
+        except OSError as e:
+            print(f"⚠️ Could not save profile {request_id}: {e}")
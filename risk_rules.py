@@ -0,0 +1,152 @@
+import operator
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Thresholds behind the detailed analysis and the recommendation, as declarative tables evaluated
+# with numpy masks over a whole batch of applicants. The UI's single applicant walks the same tables
+# with plain comparisons, which beats numpy's per-call overhead for one row
+
+# These compare scalars, and elementwise when given numpy arrays
+OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq}
+
+# A rule fires when every (operator, threshold) condition holds for its column; reported rules
+# attach the column's value to the factor, the others attach None
+Rule = namedtuple('Rule', ['section', 'code', 'column', 'conditions', 'reported'])
+
+# Columns computed from others rather than read from the applicant
+DERIVED_COLUMNS = {'Debt_To_Income_Pct'}
+
+ANALYSIS_SECTIONS = ['positive_factors', 'risk_concerns', 'critical_factors', 'financial_indicators']
+
+ANALYSIS_RULES = [
+    Rule('positive_factors', 'strong_income', 'Annual_Income', [('>', 50000)], True),
+    Rule('positive_factors', 'optimal_age', 'Age', [('>=', 25), ('<=', 55)], True),
+    Rule('positive_factors', 'long_credit_history', 'Credit_History_Age_Years', [('>', 5)], True),
+    Rule('positive_factors', 'reliable_payments', 'Payment_of_Min_Amount', [('==', 1)], False),
+    Rule('positive_factors', 'low_utilization', 'Credit_Utilization_Ratio', [('<', 30)], True),
+    Rule('risk_concerns', 'payment_delays', 'Num_of_Delayed_Payment', [('>', 3)], True),
+    Rule('risk_concerns', 'high_utilization', 'Credit_Utilization_Ratio', [('>', 70)], True),
+    Rule('risk_concerns', 'low_income', 'Annual_Income', [('<', 30000)], True),
+    Rule('critical_factors', 'debt_to_income', 'Debt_To_Income_Pct', [('>', 80)], True),
+    Rule('critical_factors', 'excessive_delays', 'Num_of_Delayed_Payment', [('>', 10)], True),
+    Rule('critical_factors', 'thin_credit_history', 'Credit_History_Age_Years', [('<', 1)], False),
+    Rule('financial_indicators', 'monthly_salary', 'Monthly_Inhand_Salary', [('>', 0)], True),
+    Rule('financial_indicators', 'bank_accounts', 'Num_Bank_Accounts', [('>', 0)], True),
+    Rule('financial_indicators', 'monthly_investment', 'Amount_invested_monthly', [('>', 0)], True)
+]
+
+# Applicant columns the analysis reads: every rule's column plus the debt the ratio is derived from
+ANALYSIS_COLUMNS = sorted({rule.column for rule in ANALYSIS_RULES} - DERIVED_COLUMNS | {'Outstanding_Debt'})
+
+# Code added to a section none of whose rules fired
+SECTION_FALLBACKS = {
+    'positive_factors': 'basic_profile',
+    'risk_concerns': 'no_concerns',
+    'critical_factors': 'no_critical'
+}
+
+# Recommendation labels as (column, [(operator, threshold, label), ...], default); the first match wins
+RECOMMENDATION_LABELS = {
+    'tier': ('risk_pct', [('<', 15, 'premium'), ('<', 25, 'standard')], 'review'),
+    'loan_to_income': ('loan_to_income_ratio', [('<', 20, 'Conservative'), ('<', 35, 'Reasonable')], 'Moderate'),
+    'utilization': ('credit_utilization', [('<', 30, 'Excellent')], 'Acceptable'),
+    'credit_history': ('credit_history_years', [('>', 5, 'Excellent')], 'Adequate'),
+    'debt_management': ('debt_income_ratio', [('<', 40, 'Strong')], 'Manageable')
+}
+
+def raw_columns(applicants, columns):
+    """The given columns of a DataFrame or a list of dicts as Python lists; missing values count as 0"""
+    if isinstance(applicants, pd.DataFrame):
+        return {column: (applicants[column].tolist() if column in applicants.columns else [0] * len(applicants))
+                for column in columns}
+    return {column: [applicant.get(column, 0) for applicant in applicants] for column in columns}
+
+def analysis_columns(raw):
+    """Float arrays of the raw columns the analysis rules read, with the derived debt-to-income percentage"""
+    columns = {column: np.array(values, dtype=np.float64) for column, values in raw.items()}
+    income, debt = columns['Annual_Income'], columns['Outstanding_Debt']
+    ratio = np.zeros(len(income))
+    np.divide(debt, income, out=ratio, where=income > 0)
+    columns['Debt_To_Income_Pct'] = ratio * 100
+    return columns
+
+def rule_mask(values, conditions):
+    """Rows where every (operator, threshold) condition holds"""
+    mask = OPERATORS[conditions[0][0]](values, conditions[0][1])
+    for op, threshold in conditions[1:]:
+        mask &= OPERATORS[op](values, threshold)
+    return mask
+
+def evaluate_rules(columns, rules=ANALYSIS_RULES):
+    """Boolean matrix of which rule fired for which applicant, shape (applicants, rules)"""
+    return np.column_stack([rule_mask(columns[rule.column], rule.conditions) for rule in rules])
+
+def analyze_batch(applicants):
+    """Each applicant's risk factors as (code, value) pairs per analysis section
+
+    applicants is a list of averages dicts or a DataFrame with the same columns.
+    Reported values are the applicant's own values (0 when missing), so a dict's ints stay ints.
+    """
+    raw = raw_columns(applicants, ANALYSIS_COLUMNS)
+    columns = analysis_columns(raw)
+    raw['Debt_To_Income_Pct'] = columns['Debt_To_Income_Pct'].tolist()
+    results = [{section: [] for section in ANALYSIS_SECTIONS} for _ in range(len(columns['Annual_Income']))]
+    if not results:
+        return results
+    rows, indexes = np.nonzero(evaluate_rules(columns))
+    for row, index in zip(rows.tolist(), indexes.tolist()):
+        rule = ANALYSIS_RULES[index]
+        results[row][rule.section].append((rule.code, raw[rule.column][row] if rule.reported else None))
+    for factors in results:
+        for section, code in SECTION_FALLBACKS.items():
+            if not factors[section]:
+                factors[section].append((code, None))
+    return results
+
+def analyze_applicant(applicant):
+    """One averages dict's risk factors, exactly as analyze_batch reports them for a batch of one"""
+    values = {column: applicant.get(column, 0) for column in ANALYSIS_COLUMNS}
+    income = values['Annual_Income']
+    values['Debt_To_Income_Pct'] = (values['Outstanding_Debt'] / income * 100) if income > 0 else 0
+    factors = {section: [] for section in ANALYSIS_SECTIONS}
+    for rule in ANALYSIS_RULES:
+        value = values[rule.column]
+        if all(OPERATORS[op](value, threshold) for op, threshold in rule.conditions):
+            factors[rule.section].append((rule.code, value if rule.reported else None))
+    for section, code in SECTION_FALLBACKS.items():
+        if not factors[section]:
+            factors[section].append((code, None))
+    return factors
+
+def factor_codes(applicants):
+    """Fired rule codes per section as a DataFrame of '; '-joined cells, one row per applicant"""
+    return pd.DataFrame([{section: '; '.join(code for code, _ in entries) for section, entries in factors.items()}
+                         for factors in analyze_batch(applicants)])
+
+def label_batch(columns, labels=RECOMMENDATION_LABELS):
+    """Recommendation labels for every row of columns, as arrays of strings; labels whose column is absent are skipped"""
+    results = {}
+    for name, (column, bands, default) in labels.items():
+        if column not in columns:
+            continue
+        values = np.asarray(columns[column], dtype=np.float64)
+        conditions = [OPERATORS[op](values, threshold) for op, threshold, _ in bands]
+        results[name] = np.select(conditions, [label for _, _, label in bands], default)
+    return results
+
+def recommendation_labels(figures):
+    """Recommendation labels of one applicant's figures dict, the first matching band of each"""
+    labels = {}
+    for name, (column, bands, default) in RECOMMENDATION_LABELS.items():
+        value = figures.get(column, 0)
+        labels[name] = next((label for op, threshold, label in bands if OPERATORS[op](value, threshold)), default)
+    return labels
+
+def recommendation_tier(risk_pct):
+    """Recommendation tier of each risk percentage as its position in the tier table: 0 premium, 1 standard, 2 review"""
+    _, bands, default = RECOMMENDATION_LABELS['tier']
+    order = [label for _, _, label in bands] + [default]
+    tiers = label_batch({'risk_pct': risk_pct}, {'tier': RECOMMENDATION_LABELS['tier']})['tier']
+    return np.select([tiers == label for label in order[:-1]], list(range(len(order) - 1)), len(order) - 1)
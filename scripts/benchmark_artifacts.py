@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+import warnings
+warnings.filterwarnings('ignore')
+
+# Run from the project root so the model files resolve
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from model_artifacts import codec_available, describe_compression, parse_compression
+from training_data import MODEL_FILES
+
+# Configuration
+DEFAULT_CODECS = 'none,zlib:1,zlib:3,zlib:6,zlib:9,lzma:1,lzma:6,lz4:1,lz4:3'
+DEFAULT_OUTPUT = 'artifact_benchmark.json'
+DEFAULT_REPEATS = 5
+
+def evict_from_page_cache(path):
+    """Drop a file's pages from the OS page cache so the next read comes from disk; False where unsupported"""
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        return True
+    finally:
+        os.close(fd)
+
+def timed_load(path):
+    t0 = time.perf_counter()
+    joblib.load(path)
+    return time.perf_counter() - t0
+
+def benchmark_codec(model, compress, directory, repeats):
+    """Size, write time, cold-load and warm-load times of one model saved with one codec"""
+    path = os.path.join(directory, 'artifact.pkl')
+    t0 = time.perf_counter()
+    joblib.dump(model, path, compress=compress)
+    write_seconds = time.perf_counter() - t0
+
+    cold, evicted = [], True
+    for _ in range(repeats):
+        evicted = evict_from_page_cache(path) and evicted
+        cold.append(timed_load(path))
+    # The file is in the page cache now, so these measure decompression and unpickling alone
+    warm = [timed_load(path) for _ in range(repeats)]
+    result = {
+        'size_mb': round(os.path.getsize(path) / 1024 ** 2, 2),
+        'write_s': round(write_seconds, 3),
+        'cold_load_s': round(float(np.median(cold)), 3),
+        'warm_load_s': round(float(np.median(warm)), 3),
+        'cold_evicted': evicted
+    }
+    os.remove(path)
+    return result
+
+def main():
+    """Benchmark artifact size and load speed of each bank model under each compression codec"""
+    parser = argparse.ArgumentParser(description='Model artifact size and load-speed benchmark per compression codec')
+    parser.add_argument('--banks', nargs='*', default=sorted(MODEL_FILES), choices=sorted(MODEL_FILES),
+                        help='Bank models to benchmark')
+    parser.add_argument('--codecs', default=DEFAULT_CODECS,
+                        help="Comma-separated 'none' / CODEC:LEVEL settings, as MODEL_COMPRESSION takes them")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help='Loads per measurement; the median is kept')
+    parser.add_argument('--dir', help='Directory to write the trial artifacts in, on the storage being evaluated '
+                                      '(default: a temporary directory)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Where to write the JSON results')
+    args = parser.parse_args()
+
+    codecs = []
+    for spec in args.codecs.split(','):
+        compress = parse_compression(spec)
+        if not codec_available(compress):
+            print(f"⚠️ {describe_compression(spec)} skipped: lz4 is not installed")
+            continue
+        codecs.append(spec.strip())
+
+    directory = tempfile.mkdtemp(prefix='artifact_benchmark_', dir=args.dir)
+    results = {}
+    try:
+        for bank in args.banks:
+            model_file = MODEL_FILES[bank]
+            if not os.path.exists(model_file):
+                print(f"⚠️ {bank.upper()} skipped: {model_file} not found")
+                continue
+            model = joblib.load(model_file)
+            print(f"\n⏱  {bank.upper()} ({model_file})")
+            print(f"  {'codec':<14}{'size MB':>9}{'write s':>9}{'cold s':>9}{'warm s':>9}")
+            results[bank] = {}
+            for spec in codecs:
+                result = benchmark_codec(model, parse_compression(spec), directory, args.repeats)
+                results[bank][describe_compression(spec)] = result
+                print(f"  {describe_compression(spec):<14}{result['size_mb']:>9.2f}{result['write_s']:>9.3f}"
+                      f"{result['cold_load_s']:>9.3f}{result['warm_load_s']:>9.3f}")
+            fastest = min(results[bank], key=lambda codec: results[bank][codec]['cold_load_s'])
+            smallest = min(results[bank], key=lambda codec: results[bank][codec]['size_mb'])
+            print(f"  ✓ fastest cold load: {fastest}, smallest: {smallest}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if results and not all(result['cold_evicted'] for bank in results.values() for result in bank.values()):
+        print("⚠️ Page cache eviction is unsupported here; cold loads may have been served from memory")
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'joblib': joblib.__version__,
+        'repeats': args.repeats,
+        'storage': args.dir or tempfile.gettempdir(),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
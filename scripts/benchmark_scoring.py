@@ -0,0 +1,332 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Run from the project root so app.py finds its CSVs and model files
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+# Live stages must score every request; the materialized table is built and timed as its own stage
+os.environ['MATERIALIZED_SCORES'] = '0'
+
+# Configuration
+DEFAULT_OUTPUT = 'benchmark_results.json'
+DEFAULT_ITERATIONS = 200
+DEFAULT_WARMUP = 20
+DEFAULT_THRESHOLD = 0.10
+# Off the materialized grid, so /process scores them live
+LOAN_AMOUNTS = [7500, 30000, 60000, 120000, 200000]
+BANKS = ['sb', 'pb', 'fnb', 'bbank']
+
+def percentile_stats(samples_ns, total_seconds):
+    """Summarise per-call latencies (nanoseconds) into milliseconds"""
+    samples_ms = np.asarray(samples_ns, dtype=float) / 1e6
+    return {
+        'calls': int(len(samples_ms)),
+        'mean_ms': float(samples_ms.mean()),
+        'p50_ms': float(np.percentile(samples_ms, 50)),
+        'p95_ms': float(np.percentile(samples_ms, 95)),
+        'p99_ms': float(np.percentile(samples_ms, 99)),
+        'max_ms': float(samples_ms.max()),
+        'throughput_per_s': float(len(samples_ms) / total_seconds) if total_seconds > 0 else 0.0
+    }
+
+def time_stage(func, cases, iterations, warmup):
+    """Call func(*case) round-robin over cases and collect per-call latencies"""
+    for i in range(warmup):
+        func(*cases[i % len(cases)])
+
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        case = cases[i % len(cases)]
+        t0 = time.perf_counter_ns()
+        func(*case)
+        samples.append(time.perf_counter_ns() - t0)
+    total = time.perf_counter() - started
+    return percentile_stats(samples, total)
+
+def time_concurrent(func, cases, iterations, warmup, concurrency):
+    """Call func(*case) from concurrency threads; throughput is calls over wall time"""
+    for i in range(warmup):
+        func(*cases[i % len(cases)])
+
+    samples = []
+    lock = threading.Lock()
+
+    def timed(case):
+        t0 = time.perf_counter_ns()
+        func(*case)
+        elapsed = time.perf_counter_ns() - t0
+        with lock:
+            samples.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, [cases[i % len(cases)] for i in range(iterations)]))
+    total = time.perf_counter() - started
+    stats = percentile_stats(samples, total)
+    stats['concurrency'] = concurrency
+    return stats
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return 'unknown'
+
+def build_cases(app_module, seed, loan_amounts=LOAN_AMOUNTS):
+    """Deterministic (customer_id, loan_amount) pairs drawn from the bundled bank CSVs"""
+    customer_ids = app_module.get_customer_store().customer_ids(['sb', 'pb', 'fnb'])
+
+    rng = random.Random(seed)
+    cases = [(customer_id, float(loan_amount)) for customer_id in customer_ids for loan_amount in loan_amounts]
+    rng.shuffle(cases)
+    return cases
+
+def run_benchmarks(iterations, warmup, seed, concurrency=1):
+    """Measure each stage of the /process hot path"""
+    print("📦 Importing app...")
+    t0 = time.perf_counter()
+    import app as app_module
+    import_seconds = time.perf_counter() - t0
+    print(f"✓ App importable in {import_seconds:.2f}s")
+    # Load every bank up front so first-use loading is not timed as a stage
+    t0 = time.perf_counter()
+    app_module.warm_banks()
+    warm_seconds = time.perf_counter() - t0
+
+    cases = build_cases(app_module, seed)
+    if not cases:
+        raise RuntimeError("No customers found in the bundled datasets")
+    print(f"✓ {len(cases)} benchmark cases from {len(set(c[0] for c in cases))} customers")
+
+    # Precompute the inputs each stage consumes so stages are timed in isolation
+    lookups = {}
+    averages_cases = []
+    for customer_id, loan_amount in cases:
+        if customer_id not in lookups:
+            lookups[customer_id] = app_module.get_customer_data(customer_id)[0]
+        averages_cases.append((lookups[customer_id], loan_amount))
+
+    prepared = []
+    for customer_data, loan_amount in averages_cases:
+        averages, original_debt, debt_income_ratio = app_module.calculate_enhanced_averages(customer_data, loan_amount)
+        annual_income = float(customer_data['Annual_Income'].iloc[0]) if pd.notna(customer_data['Annual_Income'].iloc[0]) else 0
+        loan_to_income_ratio = (loan_amount / annual_income * 100) if annual_income > 0 else 0
+        prepared.append((customer_data, averages, loan_amount, debt_income_ratio, loan_to_income_ratio))
+
+    stages = {}
+
+    print("⏱  get_customer_data")
+    stages['get_customer_data'] = time_stage(
+        app_module.get_customer_data, [(c[0],) for c in cases], iterations, warmup)
+
+    print("⏱  calculate_enhanced_averages")
+    stages['calculate_enhanced_averages'] = time_stage(
+        app_module.calculate_enhanced_averages, averages_cases, iterations, warmup)
+
+    for name in BANKS:
+        stage_name = f'predict_enhanced_risk[{name}]'
+        model = app_module.models.get(name)
+        if model is None:
+            print(f"⚠️ {stage_name} skipped: model unavailable")
+            stages[stage_name] = {'skipped': 'model unavailable'}
+            continue
+        print(f"⏱  {stage_name}")
+        stages[stage_name] = time_stage(
+            app_module.predict_enhanced_risk,
+            [(p[1], model, name.upper()) for p in prepared], iterations, warmup)
+
+    # Early-exit evaluation on the compiled models: latency plus trees evaluated per call
+    data_points = [p[1] for p in prepared]
+    for name in BANKS:
+        model = app_module.models.get(name)
+        compiled = app_module.get_compiled_model(model) if model is not None else None
+        if compiled is None:
+            continue
+        full_proba = compiled.predict_proba(data_points)
+        for mode in ('class', 'tolerance'):
+            stage_name = f'predict_early[{name}:{mode}]'
+            print(f"⏱  {stage_name}")
+            options = (mode, app_module.EARLY_EXIT_TOLERANCE, app_module.EARLY_EXIT_CHUNK)
+            stages[stage_name] = time_stage(compiled.predict_one_early,
+                                            [(p,) + options for p in data_points], iterations, warmup)
+            results = [compiled.predict_one_early(p, *options) for p in data_points]
+            stages[stage_name]['mean_trees'] = float(np.mean([r[2] for r in results]))
+            stages[stage_name]['total_trees'] = int(compiled.trees.n_trees)
+            stages[stage_name]['max_high_risk_diff_pct'] = float(np.max(np.abs(
+                np.array([r[1][-1] for r in results]) - full_proba[:, -1])) * 100)
+
+    print("⏱  generate_recommendation_html")
+    recommendation_cases = []
+    for customer_data, averages, loan_amount, debt_income_ratio, loan_to_income_ratio in prepared:
+        for risk_pct in (10.0, 20.0, 60.0):
+            recommendation_cases.append((customer_data, averages, risk_pct, loan_amount,
+                                         debt_income_ratio, loan_to_income_ratio))
+    stages['generate_recommendation_html'] = time_stage(
+        app_module.generate_recommendation_html, recommendation_cases, iterations, warmup)
+
+    client = app_module.app.test_client()
+    for response_format in ('html', 'compact'):
+        stage_name = 'process' if response_format == 'html' else f'process[{response_format}]'
+        print(f"⏱  /{stage_name} (Flask test client)")
+        failures = []
+        payload_bytes = []
+
+        def post_process(customer_id, loan_amount):
+            response = client.post('/process', data={'customer_id': customer_id, 'loan_amount': str(loan_amount),
+                                                     'format': response_format})
+            payload_bytes.append(len(response.get_data()))
+            if not response.get_json().get('success'):
+                failures.append(customer_id)
+
+        stages[stage_name] = time_stage(post_process, cases, iterations, warmup)
+        stages[stage_name]['failed_responses'] = len(failures)
+        stages[stage_name]['mean_payload_bytes'] = float(np.mean(payload_bytes))
+
+    # Grid loan amounts answered from the materialized table, built up front so it is not timed
+    print("💾 Materializing scores for the grid loan amounts...")
+    t0 = time.perf_counter()
+    app_module.materialize_scores()
+    materialize_seconds = time.perf_counter() - t0
+    stage_name = 'process[materialized]'
+    print(f"⏱  /{stage_name} (Flask test client)")
+    missed = []
+
+    def post_materialized(customer_id, loan_amount):
+        response = client.post('/process', data={'customer_id': customer_id, 'loan_amount': str(loan_amount)})
+        if not response.get_json().get('materialized'):
+            missed.append(customer_id)
+
+    stages[stage_name] = time_stage(post_materialized, build_cases(app_module, seed, app_module.LOAN_AMOUNT_GRID),
+                                    iterations, warmup)
+    stages[stage_name]['live_responses'] = len(missed)
+    # Later stages score live again
+    app_module._score_table = None
+
+    if concurrency > 1:
+        stage_name = f'process[concurrent x{concurrency}]'
+        print(f"⏱  /{stage_name} (Flask test client per thread)")
+        local = threading.local()
+        failures = []
+
+        def post_concurrent(customer_id, loan_amount):
+            if not hasattr(local, 'client'):
+                local.client = app_module.app.test_client()
+            response = local.client.post('/process', data={'customer_id': customer_id,
+                                                           'loan_amount': str(loan_amount), 'format': 'compact'})
+            if not response.get_json().get('success'):
+                failures.append(customer_id)
+
+        stages[stage_name] = time_concurrent(post_concurrent, cases, iterations, warmup, concurrency)
+        stages[stage_name]['failed_responses'] = len(failures)
+        if app_module.inference_scheduler is not None:
+            stages[stage_name]['scheduler'] = app_module.inference_scheduler.stats()
+
+    import sklearn
+    return {
+        'created_at': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'versions': {'numpy': np.__version__, 'pandas': pd.__version__, 'scikit-learn': sklearn.__version__},
+        'iterations': iterations,
+        'warmup': warmup,
+        'seed': seed,
+        'cases': len(cases),
+        'concurrency': concurrency,
+        'batch_window_ms': app_module.INFERENCE_BATCH_WINDOW_MS,
+        'app_import_seconds': import_seconds,
+        'app_warm_seconds': warm_seconds,
+        'materialize_seconds': materialize_seconds,
+        'stages': stages
+    }
+
+def compare_runs(baseline_file, current_file, threshold, metric):
+    """Compare two result files; returns the list of regressed stages"""
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    with open(current_file) as f:
+        current = json.load(f)
+
+    print(f"📊 Comparing {metric}: {baseline_file} ({baseline.get('git_revision')}) -> "
+          f"{current_file} ({current.get('git_revision')})")
+    print(f"{'Stage':<36} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    print("-" * 72)
+
+    regressions = []
+    for stage, base_stats in baseline['stages'].items():
+        cur_stats = current['stages'].get(stage)
+        if cur_stats is None or metric not in base_stats or metric not in cur_stats:
+            print(f"{stage:<36} {'-':>12} {'-':>12} {'n/a':>9}")
+            continue
+        base_value = base_stats[metric]
+        cur_value = cur_stats[metric]
+        change = (cur_value - base_value) / base_value if base_value > 0 else 0.0
+        # Throughput regresses when it drops, latencies when they grow
+        regressed = change < -threshold if metric == 'throughput_per_s' else change > threshold
+        marker = " ✗" if regressed else ""
+        print(f"{stage:<36} {base_value:>12.3f} {cur_value:>12.3f} {change:>+8.1%}{marker}")
+        if regressed:
+            regressions.append(stage)
+
+    if regressions:
+        print(f"\n✗ {len(regressions)} stage(s) regressed more than {threshold:.0%}: {', '.join(regressions)}")
+    else:
+        print(f"\n✓ No stage regressed more than {threshold:.0%}")
+    return regressions
+
+def main():
+    """Run the scoring benchmarks or compare two previous runs"""
+    parser = argparse.ArgumentParser(description='Benchmark the /process scoring hot path')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON file to write results to')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Timed calls per stage')
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help='Untimed calls per stage')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the case ordering')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Also time /process from this many threads (set INFERENCE_BATCH_WINDOW_MS to batch them)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two result files instead of running benchmarks')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed relative regression before failing (0.10 = 10%%)')
+    parser.add_argument('--metric', default='p50_ms',
+                        choices=['mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'throughput_per_s'],
+                        help='Statistic used by --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare_runs(args.compare[0], args.compare[1], args.threshold, args.metric)
+        sys.exit(1 if regressions else 0)
+
+    print("🚀 Benchmarking scoring hot path")
+    print("=" * 50)
+    results = run_benchmarks(args.iterations, args.warmup, args.seed, args.concurrency)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n{'Stage':<36} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+    print("-" * 76)
+    for stage, stats in results['stages'].items():
+        if 'skipped' in stats:
+            print(f"{stage:<36} skipped ({stats['skipped']})")
+            continue
+        print(f"{stage:<36} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f} "
+              f"{stats['throughput_per_s']:>10.1f}")
+    print(f"\n💾 Results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import copy
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import train_test_split
+import warnings
+warnings.filterwarnings('ignore')
+
+# Run from the project root so the bank CSVs and model files resolve
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from compiled_model import CompiledModel
+from feature_schema import NUMERIC_FEATURES, CATEGORICAL_FEATURES, BBANK_CATEGORICAL_FEATURES
+from risk_rules import recommendation_tier
+from training_data import MODEL_FILES, load_training_rows
+
+# Configuration
+TREE_COUNTS = [5, 10, 15, 20, 30, 40, 50, 75, 100, 150, 200, 250, 300]
+DEFAULT_ACCURACY_TOLERANCE = 0.005
+DEFAULT_LOG_LOSS_TOLERANCE = 0.01
+DEFAULT_ECE_TOLERANCE = 0.01
+LATENCY_SAMPLES = 200
+
+def compressed_path(model_file):
+    """Artifact name for the compressed copy of a model file"""
+    return model_file.replace('.pkl', '_compressed.pkl')
+
+def evaluation_rows(bank):
+    """Selection and evaluation halves of the model's held-out split"""
+    data = load_training_rows()
+    if bank == 'bbank':
+        columns = NUMERIC_FEATURES + BBANK_CATEGORICAL_FEATURES
+    else:
+        data = data[data['Source_Bank'] == bank.upper()]
+        columns = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+    X, y = data[columns], data['Risk_Level']
+    # Same split the bank models were trained with
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    return train_test_split(X_test, y_test, test_size=0.5, random_state=0, stratify=y_test)
+
+def tree_orders(compiled, data_points):
+    """Per fold, trees in the order that best reproduces the full forest's probabilities
+
+    Greedy forward selection: each step adds the tree whose inclusion brings
+    the running subset mean closest (squared error) to the full forest on the
+    selection rows, so every prefix of the order is a good subset.
+    """
+    numeric, categorical = compiled.schema.encode(data_points)
+    trees = compiled.trees
+    values = trees.value[trees.apply(compiled.transform(numeric, categorical))]
+    orders = []
+    for start, size in zip(trees.group_starts, trees.group_sizes):
+        per_tree = np.moveaxis(values[:, start:start + size], 1, 0)
+        target = per_tree.mean(axis=0)
+        subset_sum = np.zeros_like(target)
+        remaining = np.ones(size, dtype=bool)
+        order = []
+        for k in range(size):
+            error = (((subset_sum + per_tree) / (k + 1) - target) ** 2).sum(axis=(1, 2))
+            error[~remaining] = np.inf
+            best = int(np.argmin(error))
+            order.append(best)
+            subset_sum += per_tree[best]
+            remaining[best] = False
+        orders.append(order)
+    return orders
+
+def subset_model(model, orders, n_trees):
+    """Copy of model keeping the first n_trees of each fold's order"""
+    compressed = copy.deepcopy(model)
+    # The base pipeline fitted before calibration is never used to predict; keep only its parameters
+    compressed.estimator = clone(model.estimator)
+    for calibrated, order in zip(compressed.calibrated_classifiers_, orders):
+        forest = calibrated.estimator.named_steps['classifier']
+        forest.estimators_ = [forest.estimators_[i] for i in order[:n_trees]]
+        forest.n_estimators = len(forest.estimators_)
+    return compressed
+
+def artifact_size_mb(model, compress):
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer, compress=compress)
+    return buffer.tell() / (1024 * 1024)
+
+def expected_calibration_error(proba, y, bins=10):
+    """Top-label ECE over equal-width confidence bins"""
+    confidence = proba.max(axis=1)
+    correct = (np.argmax(proba, axis=1) == y)
+    edges = np.linspace(0, 1, bins + 1)
+    ece = 0.0
+    for low, high in zip(edges[:-1], edges[1:]):
+        in_bin = (confidence > low) & (confidence <= high)
+        if in_bin.any():
+            ece += in_bin.mean() * abs(correct[in_bin].mean() - confidence[in_bin].mean())
+    return float(ece)
+
+def evaluate(model, data_points, y, full_proba, compress):
+    """Quality, fidelity to the full model, size and single-row latency"""
+    compiled = CompiledModel(model)
+    proba = compiled.predict_proba(data_points)
+    y_index = np.searchsorted(compiled.classes, y)
+    sample = data_points[:LATENCY_SAMPLES]
+    compiled.predict_one(sample[0])
+    t0 = time.perf_counter()
+    for data_point in sample:
+        compiled.predict_one(data_point)
+    latency_ms = (time.perf_counter() - t0) * 1000 / len(sample)
+    return {
+        'trees_per_fold': int(compiled.trees.group_sizes[0]),
+        'accuracy': float(accuracy_score(y_index, np.argmax(proba, axis=1))),
+        'log_loss': float(log_loss(y_index, proba, labels=np.arange(len(compiled.classes)))),
+        'ece': expected_calibration_error(proba, y_index),
+        'max_high_risk_diff_pct': float(np.abs(proba[:, -1] - full_proba[:, -1]).max() * 100),
+        'tier_agreement': float((recommendation_tier(proba[:, -1] * 100) == recommendation_tier(full_proba[:, -1] * 100)).mean()),
+        'size_mb': artifact_size_mb(model, compress),
+        'latency_ms': latency_ms
+    }
+
+def within_tolerance(result, baseline, args):
+    return (result['accuracy'] >= baseline['accuracy'] - args.accuracy_tolerance and
+            result['log_loss'] <= baseline['log_loss'] + args.log_loss_tolerance and
+            result['ece'] <= baseline['ece'] + args.ece_tolerance)
+
+def within_budget(result, args):
+    return ((args.max_size_mb is None or result['size_mb'] <= args.max_size_mb) and
+            (args.max_latency_ms is None or result['latency_ms'] <= args.max_latency_ms))
+
+def main():
+    """Select a per-fold tree subset that meets a size or latency budget within quality tolerances"""
+    parser = argparse.ArgumentParser(description='Compress a bank model by keeping its most useful trees')
+    parser.add_argument('--bank', required=True, choices=sorted(MODEL_FILES), help='Bank model to compress')
+    parser.add_argument('--max-size-mb', type=float, help='Artifact size budget')
+    parser.add_argument('--max-latency-ms', type=float, help='Single-row compiled scoring budget')
+    parser.add_argument('--accuracy-tolerance', type=float, default=DEFAULT_ACCURACY_TOLERANCE,
+                        help='Allowed accuracy drop against the full model')
+    parser.add_argument('--log-loss-tolerance', type=float, default=DEFAULT_LOG_LOSS_TOLERANCE,
+                        help='Allowed log loss increase against the full model')
+    parser.add_argument('--ece-tolerance', type=float, default=DEFAULT_ECE_TOLERANCE,
+                        help='Allowed expected calibration error increase against the full model')
+    parser.add_argument('--compress', type=int, default=3, help='joblib compression level for the artifact')
+    parser.add_argument('--output', help='Compressed artifact path (default: <model>_compressed.pkl)')
+    parser.add_argument('--force', action='store_true', help='Write the artifact even when tolerances are missed')
+    args = parser.parse_args()
+
+    model_file = MODEL_FILES[args.bank]
+    output = args.output or compressed_path(model_file)
+    print(f"🚀 Compressing {args.bank.upper()} model ({model_file})")
+    print("=" * 50)
+    if not os.path.exists(model_file):
+        print(f"✗ Model file {model_file} not found")
+        sys.exit(1)
+    model = joblib.load(model_file)
+
+    X_select, X_eval, _, y_eval = evaluation_rows(args.bank)
+    select_points, eval_points = X_select.to_dict('records'), X_eval.to_dict('records')
+    print(f"✓ {len(select_points)} selection rows, {len(eval_points)} evaluation rows")
+
+    compiled = CompiledModel(model)
+    full_proba = compiled.predict_proba(eval_points)
+    print("🔄 Ordering trees by greedy forward selection...")
+    orders = tree_orders(compiled, select_points)
+
+    full_trees = int(compiled.trees.group_sizes.min())
+    baseline = evaluate(model, eval_points, y_eval.values, full_proba, args.compress)
+    results = []
+    for n_trees in [n for n in TREE_COUNTS if n < full_trees]:
+        result = evaluate(subset_model(model, orders, n_trees), eval_points, y_eval.values, full_proba, args.compress)
+        result['within_tolerance'] = within_tolerance(result, baseline, args)
+        result['within_budget'] = within_budget(result, args)
+        results.append(result)
+
+    print(f"\n{'Trees/fold':>10} {'Accuracy':>9} {'Log loss':>9} {'ECE':>7} {'Tier agree':>11} {'Size MB':>8} {'ms':>6}")
+    print("-" * 66)
+    for result in results + [dict(baseline, within_tolerance=True, within_budget=within_budget(baseline, args))]:
+        marker = '' if result['within_tolerance'] else ' ✗'
+        print(f"{result['trees_per_fold']:>10} {result['accuracy']:>9.4f} {result['log_loss']:>9.4f} {result['ece']:>7.4f} "
+              f"{result['tier_agreement']:>11.1%} {result['size_mb']:>8.2f} {result['latency_ms']:>6.2f}{marker}")
+
+    # With a budget, keep the most trees that fit it; without one, the fewest within tolerance
+    budgeted = args.max_size_mb is not None or args.max_latency_ms is not None
+    if budgeted:
+        candidates = [r for r in results if r['within_budget']]
+        chosen = max(candidates, key=lambda r: r['trees_per_fold']) if candidates else None
+    else:
+        candidates = [r for r in results if r['within_tolerance']]
+        chosen = min(candidates, key=lambda r: r['trees_per_fold']) if candidates else None
+
+    if chosen is None:
+        print("\n✗ No tree subset meets the budget" if budgeted else "\n✗ No tree subset stays within tolerance")
+        sys.exit(1)
+    if not chosen['within_tolerance'] and not args.force:
+        print(f"\n✗ {chosen['trees_per_fold']} trees/fold fits the budget but misses the quality tolerances "
+              f"(use --force to write it anyway)")
+        sys.exit(1)
+
+    compressed = subset_model(model, orders, chosen['trees_per_fold'])
+    joblib.dump(compressed, output, compress=args.compress)
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'bank': args.bank,
+        'source_model': model_file,
+        'compressed_model': output,
+        'budget': {'max_size_mb': args.max_size_mb, 'max_latency_ms': args.max_latency_ms},
+        'tolerance': {'accuracy': args.accuracy_tolerance, 'log_loss': args.log_loss_tolerance, 'ece': args.ece_tolerance},
+        'evaluation_rows': len(eval_points),
+        'full_model': dict(baseline, size_mb_on_disk=os.path.getsize(model_file) / (1024 * 1024)),
+        'chosen': chosen,
+        'candidates': results,
+        'tree_orders': orders
+    }
+    report_file = output.replace('.pkl', '_report.json')
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n✓ Kept {chosen['trees_per_fold']}/{full_trees} trees per fold: "
+          f"{os.path.getsize(output) / (1024 * 1024):.2f} MB, {chosen['latency_ms']:.2f} ms, "
+          f"accuracy {chosen['accuracy']:.4f} (full {baseline['accuracy']:.4f})")
+    print(f"💾 Compressed model saved to {output}")
+    print(f"💾 Comparison report saved to {report_file}")
+
+if __name__ == '__main__':
+    main()
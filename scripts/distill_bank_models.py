@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, RobustScaler
+import warnings
+warnings.filterwarnings('ignore')
+
+# Run from the project root so the bank CSVs and model files resolve
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from compiled_model import compile_model
+from distilled_model import STUDENT_MODEL_FILE, DistilledModel
+from feature_schema import NUMERIC_FEATURES, CATEGORICAL_FEATURES
+from materialized_scores import LOAN_AMOUNT_GRID
+from risk_rules import recommendation_tier
+from training_data import MODEL_FILES, load_bank_rows, served_rows
+
+# Configuration
+BANKS = ['sb', 'pb', 'fnb', 'bbank']
+# /process scores customers with the requested loan added to Outstanding_Debt
+LOAN_RANGE = (1000, 300000)
+FEATURES = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+DEFAULT_SERVED_LOANS = 100
+EVALUATION_LOANS = 20
+DEFAULT_FOLDS = 5
+LATENCY_SAMPLES = 200
+
+def random_loans(rng, count):
+    """Log-uniform loan amounts over LOAN_RANGE"""
+    return np.exp(rng.uniform(np.log(LOAN_RANGE[0]), np.log(LOAN_RANGE[1]), count))
+
+def build_student(n_estimators, max_depth, seed):
+    """Multi-output regression forest over the bank models' features"""
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', RobustScaler(), NUMERIC_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), CATEGORICAL_FEATURES)
+    ])
+    return Pipeline([
+        ('preprocessor', preprocessor),
+        ('regressor', RandomForestRegressor(
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            min_samples_leaf=3,
+            random_state=seed,
+            n_jobs=-1
+        ))
+    ])
+
+def fidelity_report(student_test, teacher_test, banks):
+    """How closely student probabilities follow the teachers', per bank, on the same rows"""
+    fidelity = {}
+    for b, name in enumerate(banks):
+        teacher_pct, student_pct = teacher_test[:, b, -1] * 100, student_test[:, b, -1] * 100
+        fidelity[name] = {
+            'mean_abs_diff_pct': float(np.abs(student_pct - teacher_pct).mean()),
+            'p95_abs_diff_pct': float(np.percentile(np.abs(student_pct - teacher_pct), 95)),
+            'max_abs_diff_pct': float(np.abs(student_pct - teacher_pct).max()),
+            'level_agreement': float((student_test[:, b].argmax(axis=1) == teacher_test[:, b].argmax(axis=1)).mean()),
+            'tier_agreement': float((recommendation_tier(student_pct) == recommendation_tier(teacher_pct)).mean())
+        }
+    if 'bbank' in banks and len(banks) > 1:
+        others = [b for b, name in enumerate(banks) if name != 'bbank']
+        bbank = banks.index('bbank')
+        fidelity['agreement_code'] = float((
+            agreement_code(student_test[:, bbank, -1] * 100, student_test[:, others, -1].T * 100) ==
+            agreement_code(teacher_test[:, bbank, -1] * 100, teacher_test[:, others, -1].T * 100)).mean())
+    return fidelity
+
+def agreement_code(bbank_pct, other_pcts):
+    """Same thresholds as app.describe_agreement"""
+    difference = np.abs(bbank_pct - np.mean(other_pcts, axis=0))
+    return np.where(difference < 10, 0, np.where(difference < 25, 1, 2))
+
+def mean_latency_ms(func, data_points):
+    func(data_points[0])
+    t0 = time.perf_counter()
+    for data_point in data_points:
+        func(data_point)
+    return (time.perf_counter() - t0) * 1000 / len(data_points)
+
+def main():
+    """Distil the bank models into one multi-output student and measure its fidelity on held-out customers"""
+    parser = argparse.ArgumentParser(description='Train one student model that reproduces every bank model')
+    parser.add_argument('--output', default=STUDENT_MODEL_FILE, help='Student artifact to write')
+    parser.add_argument('--trees', type=int, default=60, help='Trees in the student forest')
+    parser.add_argument('--max-depth', type=int, default=14, help='Depth of the student trees')
+    parser.add_argument('--served-loans', type=int, default=DEFAULT_SERVED_LOANS,
+                        help='Random loan amounts each customer is trained with, besides the loan grid')
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS, help='Customer folds for the fidelity evaluation')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the random loan amounts')
+    args = parser.parse_args()
+
+    print("🚀 Distilling bank models into one student")
+    print("=" * 50)
+    teachers = {}
+    for name in BANKS:
+        if os.path.exists(MODEL_FILES[name]):
+            teachers[name] = compile_model(joblib.load(MODEL_FILES[name]))
+            print(f"📁 {name.upper()} teacher loaded from {MODEL_FILES[name]}")
+        else:
+            print(f"⚠️ {name.upper()} teacher not found, it will keep being served directly")
+    teachers = {name: model for name, model in teachers.items() if model is not None}
+    if not teachers:
+        print("✗ No teacher models available")
+        sys.exit(1)
+    banks = [name for name in BANKS if name in teachers]
+    classes = teachers[banks[0]].classes
+    if any(len(teachers[name].classes) != len(classes) or (teachers[name].classes != classes).any() for name in banks):
+        print("✗ Teachers disagree on their classes")
+        sys.exit(1)
+
+    # The student learns what /process actually scores: each customer's aggregated averages with
+    # the loan added, over the loan grid and random loans. Monthly rows fit it worse on these inputs
+    raw = load_bank_rows()
+    rng = np.random.default_rng(args.seed)
+    X_train = served_rows(raw, sorted(set(LOAN_AMOUNT_GRID) | set(random_loans(rng, args.served_loans).round(2))))
+    # Fidelity rows: served rows at the grid and at loans the student never trained on
+    evaluation = served_rows(raw, sorted(set(LOAN_AMOUNT_GRID) | set(random_loans(rng, EVALUATION_LOANS).round(2))))
+    print(f"✓ {len(X_train)} served rows for training, {len(evaluation)} for fidelity")
+
+    # Targets: every teacher's calibrated probability vector side by side
+    print("🔄 Scoring rows with the teachers...")
+    train_points = X_train[FEATURES].to_dict('records')
+    test_points = evaluation[FEATURES].to_dict('records')
+    Y_train = np.hstack([teachers[name].predict_proba(train_points) for name in banks])
+    teacher_test = np.stack([teachers[name].predict_proba(test_points) for name in banks], axis=1)
+
+    # Held-out fidelity: each fold's student never saw the evaluated customers' rows
+    print(f"🔄 Measuring fidelity over {args.folds} customer folds...")
+    student_test = np.zeros_like(teacher_test)
+    customers = evaluation['Customer_ID'].unique()
+    for fold_customers in np.array_split(np.random.default_rng(args.seed).permutation(customers), args.folds):
+        held_out = X_train['Customer_ID'].isin(fold_customers).to_numpy()
+        model = build_student(args.trees, args.max_depth, args.seed)
+        model.fit(X_train.loc[~held_out, FEATURES], Y_train[~held_out])
+        rows = np.flatnonzero(evaluation['Customer_ID'].isin(fold_customers).to_numpy())
+        student_test[rows] = DistilledModel(model, banks, classes).predict_proba([test_points[i] for i in rows])
+    fidelity = fidelity_report(student_test, teacher_test, banks)
+
+    print(f"🔄 Training student ({args.trees} trees, depth {args.max_depth}, {Y_train.shape[1]} outputs)...")
+    model = build_student(args.trees, args.max_depth, args.seed)
+    model.fit(X_train[FEATURES], Y_train)
+    student = DistilledModel(model, banks, classes)
+
+    sample = test_points[:LATENCY_SAMPLES]
+    student_ms = mean_latency_ms(lambda p: student.predict_proba([p]), sample)
+    teacher_ms = sum(mean_latency_ms(teachers[name].predict_one, sample) for name in banks)
+
+    print(f"\n{'Bank':<8} {'Mean |Δ| %':>11} {'P95 |Δ| %':>10} {'Max |Δ| %':>10} {'Level':>7} {'Tier':>7}")
+    print("-" * 58)
+    for name in banks:
+        f = fidelity[name]
+        print(f"{name.upper():<8} {f['mean_abs_diff_pct']:>11.2f} {f['p95_abs_diff_pct']:>10.2f} {f['max_abs_diff_pct']:>10.2f} "
+              f"{f['level_agreement']:>7.1%} {f['tier_agreement']:>7.1%}")
+    print(f"\n⏱  Student {student_ms:.2f} ms per request vs {teacher_ms:.2f} ms for {len(banks)} teachers")
+
+    report = {
+        'trained_at': datetime.now().isoformat(),
+        'banks': banks,
+        'teachers': {name: MODEL_FILES[name] for name in banks},
+        'training_rows': len(X_train),
+        'evaluation': {'inputs': 'served', 'customers': len(customers), 'folds': args.folds,
+                       'rows': len(evaluation), 'loan_grid': list(LOAN_AMOUNT_GRID)},
+        'student': {'trees': args.trees, 'max_depth': args.max_depth, 'latency_ms': student_ms},
+        'teacher_latency_ms': teacher_ms,
+        'fidelity': fidelity
+    }
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    joblib.dump({'model': model, 'banks': banks, 'classes': classes, 'metadata': report}, args.output, compress=3)
+    report_file = args.output.replace('.pkl', '_report.json')
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Student saved to {args.output} ({os.path.getsize(args.output) / (1024 * 1024):.2f} MB)")
+    print(f"💾 Fidelity report saved to {report_file}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Run from the project root so the bundled CSVs resolve
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(PROJECT_ROOT)
+
+# Configuration
+BANK_FILES = {
+    'SB': 'SB_Train_data.csv',
+    'PB': 'PB_Train_data.csv',
+    'FNB': 'FNB_Train_data.csv'
+}
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+QUANTILE_POINTS = 201
+MAX_CATEGORIES = 500
+DEFAULT_CHUNK_SIZE = 200000
+
+# Columns with a generator of their own rather than a learned distribution
+SPECIAL_COLUMNS = ['ID', 'Customer_ID', 'Month', 'Name', 'SSN', 'Credit_History_Age']
+SSN_PATTERN = re.compile(r'^\d{3}-\d{2}-\d{4}$')
+HISTORY_PATTERN = re.compile(r'^(\d+) Years? and (\d+) Months?$')
+
+def month_index(value):
+    """Calendar index of a (possibly padded) month name, or -1"""
+    value = str(value).strip()
+    return MONTHS.index(value) if value in MONTHS else -1
+
+def value_distribution(values, limit=MAX_CATEGORIES):
+    """Frequency table of the most common values"""
+    counts = values.value_counts()
+    if len(counts) > limit:
+        counts = counts.iloc[:limit]
+    return {'values': counts.index.tolist(), 'weights': (counts / counts.sum()).tolist()}
+
+def count_decimals(values):
+    """Typical number of decimals written for a numeric column"""
+    parts = values.str.split('.', n=1).str[1].dropna()
+    if parts.empty:
+        return 0
+    return int(min(parts.str.len().median(), 8))
+
+def column_level(data, column, segment_ids):
+    """Whether a column is fixed per customer, per month segment or varies per row"""
+    per_customer = data.groupby('Customer_ID')[column].nunique().mean()
+    if per_customer <= 1.1:
+        return 'customer'
+    per_segment = data.groupby(segment_ids)[column].nunique().mean()
+    return 'segment' if per_segment <= 1.2 else 'row'
+
+def assign_segments(data):
+    """Split each customer's rows into runs of consecutive months"""
+    months = data['Month'].map(month_index).to_numpy()
+    customers = data['Customer_ID'].to_numpy()
+    new_segment = np.ones(len(data), dtype=bool)
+    if len(data) > 1:
+        same_customer = customers[1:] == customers[:-1]
+        consecutive = months[1:] == (months[:-1] + 1) % 12
+        new_segment[1:] = ~(same_customer & consecutive)
+    return np.cumsum(new_segment)
+
+def learn_numeric(raw, level):
+    """Quantiles of the clean values plus the junk patterns around them"""
+    parsed = pd.to_numeric(raw, errors='coerce')
+    clean = raw[parsed.notna()]
+    rest = raw[parsed.isna()]
+    underscored = rest[rest.str.fullmatch(r'-?\d+(\.\d+)?_')]
+    junk = rest.drop(underscored.index)
+    clean_values = parsed.dropna().to_numpy(dtype=float)
+    return {
+        'kind': 'numeric',
+        'level': level,
+        'quantiles': np.quantile(clean_values, np.linspace(0, 1, QUANTILE_POINTS)).tolist() if len(clean_values) else [0.0],
+        'integer': bool(len(clean_values) and np.all(np.mod(clean_values, 1) == 0)),
+        'decimals': count_decimals(clean),
+        'underscore_rate': len(underscored) / len(raw),
+        'junk_rate': len(junk) / len(raw),
+        'junk': value_distribution(junk) if len(junk) else None
+    }
+
+def learn_profile(data, bank):
+    """Learn per-column distributions and messy-value patterns from a bank extract"""
+    data = data.reset_index(drop=True)
+    segment_ids = assign_segments(data)
+    rows_per_customer = data.groupby('Customer_ID').size()
+    segment_lengths = pd.Series(segment_ids).value_counts()
+
+    profile = {
+        'bank': bank,
+        'source_rows': len(data),
+        'columns': data.columns.tolist(),
+        'id_prefix': re.match(r'^([A-Za-z]*)', str(data['ID'].iloc[0])).group(1) if 'ID' in data.columns else bank,
+        'rows_per_customer': value_distribution(rows_per_customer.astype(str)),
+        'segment_length': value_distribution(segment_lengths.astype(str)),
+        'segment_start_month': value_distribution(
+            data.loc[np.r_[True, segment_ids[1:] != segment_ids[:-1]], 'Month'].map(month_index).astype(str)),
+        'fields': {}
+    }
+
+    if 'Name' in data.columns:
+        names = data['Name'].dropna().str.split(n=1)
+        profile['fields']['Name'] = {
+            'first': sorted(set(names.str[0].dropna())),
+            'last': sorted(set(names.str[1].dropna()))
+        }
+
+    if 'SSN' in data.columns:
+        junk = data.loc[~data['SSN'].str.match(SSN_PATTERN), 'SSN']
+        profile['fields']['SSN'] = {
+            'level': column_level(data, 'SSN', segment_ids),
+            'junk_rate': len(junk) / len(data),
+            'junk': value_distribution(junk) if len(junk) else None
+        }
+
+    if 'Credit_History_Age' in data.columns:
+        matches = data['Credit_History_Age'].str.extract(HISTORY_PATTERN).dropna().astype(int)
+        total_months = matches[0] * 12 + matches[1]
+        profile['fields']['Credit_History_Age'] = {
+            'quantiles': np.quantile(total_months, np.linspace(0, 1, QUANTILE_POINTS)).tolist() if len(total_months) else [60.0],
+            'na_rate': 1 - len(matches) / len(data)
+        }
+
+    for column in data.columns:
+        if column in SPECIAL_COLUMNS:
+            continue
+        raw = data[column]
+        level = column_level(data, column, segment_ids)
+        parsed = pd.to_numeric(raw, errors='coerce')
+        if parsed.notna().mean() >= 0.5:
+            profile['fields'][column] = learn_numeric(raw, level)
+        else:
+            field = value_distribution(raw)
+            field.update({'kind': 'categorical', 'level': level})
+            profile['fields'][column] = field
+
+    return profile
+
+def sample_weighted(rng, distribution, size):
+    values = np.asarray(distribution['values'], dtype=object)
+    weights = np.asarray(distribution['weights'], dtype=float)
+    return values[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+def sample_quantiles(rng, quantiles, size):
+    """Inverse-CDF sampling from stored quantiles"""
+    quantiles = np.asarray(quantiles, dtype=float)
+    return np.interp(rng.random(size), np.linspace(0, 1, len(quantiles)), quantiles)
+
+def format_numbers(values, field):
+    if field['integer']:
+        return values.round().astype(np.int64).astype(str).astype(object)
+    return np.round(values, field['decimals']).astype(str).astype(object)
+
+def apply_messiness(rng, column, field):
+    """Inject trailing underscores and junk tokens at the learned row rates"""
+    n = len(column)
+    draw = rng.random(n)
+    underscore = draw < field.get('underscore_rate', 0)
+    if underscore.any():
+        column[underscore] = column[underscore] + '_'
+    junk_rate = field.get('junk_rate', 0)
+    if junk_rate and field.get('junk'):
+        junk = (draw >= field.get('underscore_rate', 0)) & (draw < field.get('underscore_rate', 0) + junk_rate)
+        if junk.any():
+            column[junk] = sample_weighted(rng, field['junk'], int(junk.sum()))
+    return column
+
+def generate_chunk(profile, rng, n_customers, first_customer, first_row, rows_per_customer=None):
+    """Generate whole customers' monthly rows as one DataFrame"""
+    if rows_per_customer:
+        customer_rows = np.full(n_customers, rows_per_customer, dtype=np.int64)
+    else:
+        customer_rows = sample_weighted(rng, profile['rows_per_customer'], n_customers).astype(np.int64)
+    n_rows = int(customer_rows.sum())
+    row_customer = np.repeat(np.arange(n_customers), customer_rows)
+
+    # Cut the row stream into consecutive-month segments that never span customers
+    lengths = sample_weighted(rng, profile['segment_length'], n_rows).astype(np.int64)
+    boundaries = np.cumsum(lengths)
+    new_segment = np.zeros(n_rows, dtype=bool)
+    new_segment[boundaries[boundaries < n_rows]] = True
+    new_segment[np.cumsum(customer_rows)[:-1]] = True
+    new_segment[0] = True
+    row_segment = np.cumsum(new_segment) - 1
+    segment_first_row = np.flatnonzero(new_segment)
+    position_in_segment = np.arange(n_rows) - segment_first_row[row_segment]
+    n_segments = len(segment_first_row)
+
+    level_index = {'customer': (n_customers, row_customer), 'segment': (n_segments, row_segment), 'row': (n_rows, np.arange(n_rows))}
+    fields = profile['fields']
+    out = {}
+
+    for column in profile['columns']:
+        if column == 'ID':
+            ids = np.arange(first_row, first_row + n_rows)
+            out[column] = np.char.add(f"{profile['id_prefix']}0x", np.char.mod('%x', ids))
+        elif column == 'Customer_ID':
+            ids = np.arange(first_customer, first_customer + n_customers)
+            out[column] = np.char.add('CUS_0x', np.char.mod('%x', ids))[row_customer]
+        elif column == 'Month':
+            start = sample_weighted(rng, profile['segment_start_month'], n_segments).astype(np.int64)
+            start = np.where(start < 0, 0, start)
+            out[column] = np.asarray(MONTHS, dtype=object)[(start[row_segment] + position_in_segment) % 12]
+        elif column == 'Name' and 'Name' in fields:
+            first = rng.choice(np.asarray(fields['Name']['first'], dtype=object), n_customers)
+            last = rng.choice(np.asarray(fields['Name']['last'], dtype=object), n_customers)
+            out[column] = (first + ' ' + last)[row_customer]
+        elif column == 'SSN' and 'SSN' in fields:
+            size, index = level_index[fields['SSN']['level']]
+            digits = rng.integers(0, 10 ** 9, size)
+            ssn = np.char.mod('%09d', digits).astype(object)
+            ssn = np.array([f'{s[:3]}-{s[3:5]}-{s[5:]}' for s in ssn], dtype=object)[index]
+            out[column] = apply_messiness(rng, ssn, fields['SSN'])
+        elif column == 'Credit_History_Age' and column in fields:
+            field = fields[column]
+            start = sample_quantiles(rng, field['quantiles'], n_segments).round().astype(np.int64)
+            total = start[row_segment] + position_in_segment
+            history = np.char.add(np.char.add(np.char.mod('%d', total // 12), ' Years and '),
+                                  np.char.add(np.char.mod('%d', total % 12), ' Months')).astype(object)
+            history[rng.random(n_rows) < field['na_rate']] = 'NA'
+            out[column] = history
+        elif column in fields:
+            field = fields[column]
+            size, index = level_index[field['level']]
+            if field['kind'] == 'numeric':
+                values = format_numbers(sample_quantiles(rng, field['quantiles'], size), field)[index]
+                out[column] = apply_messiness(rng, values, field)
+            else:
+                out[column] = sample_weighted(rng, field, size)[index]
+        else:
+            out[column] = np.full(n_rows, '', dtype=object)
+
+    return pd.DataFrame(out, columns=profile['columns'])
+
+def generate_chunks(profile, total_rows, chunk_size=DEFAULT_CHUNK_SIZE, seed=42, rows_per_customer=None,
+                    customer_offset=0):
+    """Yield DataFrames of whole customers until total_rows rows have been produced"""
+    rng = np.random.default_rng(seed)
+    if rows_per_customer:
+        mean_rows = rows_per_customer
+    else:
+        dist = profile['rows_per_customer']
+        mean_rows = float(np.dot(np.asarray(dist['values'], dtype=float), dist['weights']))
+    customers_per_chunk = max(1, int(chunk_size / max(mean_rows, 1)))
+
+    produced = 0
+    next_customer = customer_offset
+    while produced < total_rows:
+        chunk = generate_chunk(profile, rng, customers_per_chunk, next_customer, produced, rows_per_customer)
+        remaining = total_rows - produced
+        if len(chunk) > remaining:
+            chunk = chunk.iloc[:remaining]
+        produced += len(chunk)
+        next_customer += customers_per_chunk
+        yield chunk
+
+def load_profile(bank, source_file=None, profile_file=None):
+    if profile_file:
+        with open(profile_file) as f:
+            return json.load(f)
+    source_file = source_file or BANK_FILES[bank]
+    data = pd.read_csv(source_file, dtype=str, keep_default_na=False)
+    return learn_profile(data, bank)
+
+def main():
+    """Generate a large synthetic bank extract from the bundled CSVs"""
+    parser = argparse.ArgumentParser(description='Generate synthetic bank extracts at scale')
+    parser.add_argument('--bank', choices=sorted(BANK_FILES), default='SB', help='Bank whose extract is learned')
+    parser.add_argument('--source', help='CSV to learn from (defaults to the bundled extract for --bank)')
+    parser.add_argument('--rows', type=int, default=1000000, help='Number of rows to generate')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per written chunk')
+    parser.add_argument('--rows-per-customer', type=int,
+                        help='Fixed monthly rows per Customer_ID (defaults to the learned distribution)')
+    parser.add_argument('--customer-offset', type=int, default=0x100000,
+                        help='First generated Customer_ID number, to keep banks apart')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', help='CSV to write (defaults to <BANK>_Synthetic_<rows>.csv)')
+    parser.add_argument('--profile', help='Use a previously saved profile instead of learning one')
+    parser.add_argument('--save-profile', help='Write the learned profile to this JSON file')
+    args = parser.parse_args()
+
+    print(f"🧬 Learning {args.bank} profile...")
+    profile = load_profile(args.bank, args.source, args.profile)
+    print(f"✓ Profile learned from {profile['source_rows']} rows, {len(profile['columns'])} columns")
+    if args.save_profile:
+        with open(args.save_profile, 'w') as f:
+            json.dump(profile, f, indent=2)
+        print(f"💾 Profile saved to {args.save_profile}")
+
+    output = args.output or f"{args.bank}_Synthetic_{args.rows}.csv"
+    if os.path.exists(output):
+        os.remove(output)
+
+    started = time.time()
+    written = 0
+    for i, chunk in enumerate(generate_chunks(profile, args.rows, args.chunk_size, args.seed,
+                                              args.rows_per_customer, args.customer_offset)):
+        chunk.to_csv(output, mode='a', header=(i == 0), index=False)
+        written += len(chunk)
+        elapsed = time.time() - started
+        print(f"  • {written:,}/{args.rows:,} rows ({written / elapsed:,.0f} rows/s)")
+        sys.stdout.flush()
+
+    size_mb = os.path.getsize(output) / (1024 * 1024)
+    print(f"✓ {written:,} rows written to {output} ({size_mb:.1f} MB) in {time.time() - started:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Run from the project root so the bank extracts resolve
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from training_cache import TRAINING_CACHE_DIR, CacheWriter
+
+# Configuration
+# The CSV extracts are the data the shipped models and the app use. The workbooks in the repo are not
+# drop-in replacements: SB_Train_data1.xlsx is an older 8,000-row SB export, PBDataUsed.xlsx a PB export
+# with different row IDs, Train_data.xlsx a 926-row sample from no particular bank, and FNB has none.
+# Ingest a workbook by naming it, e.g. pb=PBDataUsed.xlsx
+DEFAULT_SOURCES = ['sb=SB_Train_data.csv', 'pb=PB_Train_data.csv', 'fnb=FNB_Train_data.csv']
+DEFAULT_CHUNK_ROWS = 5000
+
+def header_names(header):
+    """Header cells as column names, with the number of blank cells that lead them"""
+    names = [str(cell).strip() if cell is not None else '' for cell in header]
+    leading = 0
+    while leading < len(names) and not names[leading]:
+        leading += 1
+    return names[leading:], leading
+
+def align_row(row, width, leading):
+    """Cells of one data row under the header names
+
+    Some exports put blank cells in front of the header while the data stays
+    in the first columns; those rows end in as many blank cells instead.
+    """
+    row = list(row) + [None] * max(0, width + leading - len(row))
+    if leading and all(cell is None for cell in row[width:width + leading]):
+        return row[:width]
+    return row[leading:leading + width]
+
+def read_xlsx_chunks(path, sheet, chunk_rows):
+    """DataFrame chunks streamed from one worksheet in read-only mode"""
+    try:
+        import openpyxl
+    except ImportError:
+        raise RuntimeError("openpyxl is required to ingest Excel extracts (pip install openpyxl)")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        columns, leading = header_names(next(rows, ()))
+        batch = []
+        for row in rows:
+            if all(cell is None for cell in row):
+                continue
+            batch.append(align_row(row, len(columns), leading))
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+def read_source_chunks(path, sheet, chunk_rows):
+    """DataFrame chunks from an .xlsx workbook or a CSV extract"""
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        return read_xlsx_chunks(path, sheet, chunk_rows)
+    return pd.read_csv(path, chunksize=chunk_rows, dtype=str)
+
+def parse_sources(sources):
+    """BANK=PATH arguments grouped by bank, in the order given"""
+    grouped = {}
+    for source in sources:
+        bank, separator, path = source.partition('=')
+        if not separator or not bank or not path:
+            raise ValueError(f"Expected BANK=PATH, got '{source}'")
+        grouped.setdefault(bank.lower(), []).append(path)
+    return grouped
+
+def main():
+    """Stream bank extracts (Excel or CSV) into the columnar training cache"""
+    parser = argparse.ArgumentParser(description='Ingest bank extracts into the training cache')
+    parser.add_argument('sources', nargs='*', default=DEFAULT_SOURCES,
+                        help='BANK=PATH pairs, .xlsx or .csv; several paths for one bank are appended in order '
+                             '(default: the three bank CSV extracts, not the workbooks)')
+    parser.add_argument('--sheet', help='Worksheet to read from Excel sources (default: the first)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='Rows per chunk and Parquet row group')
+    parser.add_argument('--cache-dir', default=TRAINING_CACHE_DIR, help='Training cache directory')
+    args = parser.parse_args()
+
+    print(f"🚀 Ingesting bank extracts into {args.cache_dir}")
+    print("=" * 50)
+    for bank, paths in parse_sources(args.sources).items():
+        writer = CacheWriter(bank, args.cache_dir)
+        t0 = time.perf_counter()
+        try:
+            for path in paths:
+                before = writer.rows
+                for chunk in read_source_chunks(path, args.sheet, args.chunk_rows):
+                    writer.write(chunk)
+                print(f"✓ {bank.upper()}: {writer.rows - before} rows from {path}")
+        except Exception as e:
+            writer.abort()
+            print(f"✗ Error ingesting {bank.upper()}: {e}")
+            continue
+        rows = writer.close()
+        print(f"💾 {bank.upper()} cache saved to {writer.path}: {rows} rows, "
+              f"{os.path.getsize(writer.path) / (1024 * 1024):.2f} MB in {time.perf_counter() - t0:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# Profile from the project root, where the app module lives
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Configuration
+DEFAULT_MODULE = 'app'
+DEFAULT_TOP = 20
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+def profile_import(module, prefetch):
+    """Rows of (module, self µs, cumulative µs, depth) from python -X importtime"""
+    env = dict(os.environ, PYTHONWARNINGS='ignore')
+    if not prefetch:
+        # The background warm-up would otherwise import the model stack into the same profile
+        env['BANK_PREFETCH'] = '0'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+def summarise(rows, module, top):
+    """Total, slowest modules by cumulative time and self time grouped by top-level package"""
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split('.')[0]] += self_us
+    total_us = next((cumulative for name, _, cumulative, _ in rows if name == module), sum(packages.values()))
+    # -X importtime lists a module's imports just before the module itself, one level deeper
+    direct = []
+    position = next((i for i, row in enumerate(rows) if row[0] == module), None)
+    if position is not None:
+        depth = rows[position][3]
+        for row in reversed(rows[:position]):
+            if row[3] <= depth:
+                break
+            if row[3] == depth + 1:
+                direct.append(row)
+    direct.sort(key=lambda row: -row[2])
+    return {
+        'module': module,
+        'total_ms': total_us / 1000,
+        'modules_imported': len(rows),
+        'direct_imports': [{'module': name, 'cumulative_ms': cumulative / 1000} for name, _, cumulative, _ in direct[:top]],
+        'packages': [{'package': name, 'self_ms': self_us / 1000}
+                     for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]]
+    }
+
+def main():
+    """Per-module import time breakdown of the serving app"""
+    parser = argparse.ArgumentParser(description='Profile what importing the app costs')
+    parser.add_argument('--module', default=DEFAULT_MODULE, help='Module to import')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='Rows to show per table')
+    parser.add_argument('--prefetch', action='store_true', help='Leave the background bank prefetch running')
+    parser.add_argument('--output', help='Also write the summary as JSON')
+    args = parser.parse_args()
+
+    print(f"🔄 Profiling 'import {args.module}'...")
+    summary = summarise(profile_import(args.module, args.prefetch), args.module, args.top)
+
+    print(f"\n✓ import {args.module}: {summary['total_ms']:.0f} ms, {summary['modules_imported']} modules")
+    print(f"\n{'Direct import':<32} {'Cumulative ms':>14}")
+    print("-" * 47)
+    for row in summary['direct_imports']:
+        print(f"{row['module']:<32} {row['cumulative_ms']:>14.1f}")
+    print(f"\n{'Package':<32} {'Self ms':>14}")
+    print("-" * 47)
+    for row in summary['packages']:
+        print(f"{row['package']:<32} {row['self_ms']:>14.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n💾 Import profile saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import resource
+import sys
+from functools import partial
+
+import warnings
+warnings.filterwarnings('ignore')
+
+# Run from the project root so the bank extracts and model files resolve
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from streaming_training import (DEFAULT_BLOCK_ROWS, DEFAULT_HOLDOUT_ROWS, DEFAULT_SAMPLE_ROWS,
+                                train_streaming_model)
+from training_cache import TRAINING_CACHE_DIR, iter_bank_chunks, iter_file_chunks
+from training_data import BANK_FILES
+
+# Configuration
+DEFAULT_OUTPUT = 'B-Bank_loan_risk_model.pkl'
+DEFAULT_CHUNK_ROWS = 20000
+
+def build_sources(pairs, chunk_rows, cache_dir):
+    """(bank, chunks) pairs: explicit BANK=PATH extracts, else every bank from the training cache or its CSV"""
+    if not pairs:
+        return [(bank, partial(iter_bank_chunks, bank, filename, chunk_rows, cache_dir))
+                for bank, filename in BANK_FILES.items()]
+    sources = []
+    for pair in pairs:
+        bank, separator, path = pair.partition('=')
+        if not separator or not bank or not path:
+            raise ValueError(f"Expected BANK=PATH, got '{pair}'")
+        sources.append((bank.lower(), partial(iter_file_chunks, path, chunk_rows)))
+    return sources
+
+def main():
+    """Train the combined B-Bank model from the bank extracts without loading them into memory"""
+    parser = argparse.ArgumentParser(description='Out-of-core training for the combined B-Bank model')
+    parser.add_argument('sources', nargs='*',
+                        help='BANK=PATH extracts (CSV or Parquet); defaults to every bank in the training cache or its CSV')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Model file to write')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='Rows read from disk at a time')
+    parser.add_argument('--block-rows', type=int, default=DEFAULT_BLOCK_ROWS, help='Rows each batch of trees is fitted on')
+    parser.add_argument('--sample-rows', type=int, default=DEFAULT_SAMPLE_ROWS,
+                        help='Rows sampled to fit the scaler, encoder and fill values')
+    parser.add_argument('--holdout-rows', type=int, default=DEFAULT_HOLDOUT_ROWS,
+                        help='Held-out rows kept for calibration and evaluation')
+    parser.add_argument('--cache-dir', default=TRAINING_CACHE_DIR, help='Training cache directory')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for sampling and shuffling')
+    parser.add_argument('--report', help='Also write the training stats as JSON')
+    args = parser.parse_args()
+
+    print("🚀 Out-of-core B-Bank training")
+    print("=" * 50)
+    sources = build_sources(args.sources, args.chunk_rows, args.cache_dir)
+    model, stats = train_streaming_model(sources, 'B-Bank', args.output, block_rows=args.block_rows,
+                                         sample_rows=args.sample_rows, holdout_rows=args.holdout_rows, seed=args.seed)
+    if model is None:
+        sys.exit(1)
+
+    stats['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(f"📋 {stats['rows']} rows, {stats['forest_params']['n_estimators']} trees on {stats['blocks']} blocks, "
+          f"peak RSS {stats['peak_rss_mb']:.0f} MB")
+    if args.report:
+        report = {key: value for key, value in stats.items() if key != 'feature_importance'}
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2, default=float)
+        print(f"💾 Training report saved to {args.report}")
+
+if __name__ == '__main__':
+    main()
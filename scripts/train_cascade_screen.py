@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import GroupKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, RobustScaler
+import warnings
+warnings.filterwarnings('ignore')
+
+# Run from the project root so the bank CSVs and model files resolve
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from cascade import CASCADE_MODEL_FILE
+from compiled_model import compile_model
+from feature_schema import NUMERIC_FEATURES, CATEGORICAL_FEATURES
+from materialized_scores import LOAN_AMOUNT_GRID
+from risk_rules import recommendation_tier
+from training_data import MODEL_FILES, load_bank_rows, prepare_rows, served_rows
+
+# Configuration
+# Candidate uncertainty bands (high-risk %) evaluated for the report
+CANDIDATE_BANDS = [(2, 60), (5, 40), (5, 50), (8, 35), (10, 30), (12, 28)]
+DEFAULT_MIN_AGREEMENT = 0.98
+DEFAULT_FOLDS = 5
+LATENCY_SAMPLES = 200
+
+def build_screen(n_estimators, max_depth):
+    """Small calibrated forest over the same features as the bank models"""
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', RobustScaler(), NUMERIC_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), CATEGORICAL_FEATURES)
+    ])
+    base_model = Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', RandomForestClassifier(
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            min_samples_leaf=5,
+            random_state=42,
+            class_weight='balanced'
+        ))
+    ])
+    return CalibratedClassifierCV(base_model, method='isotonic', cv=3)
+
+def mean_latency_ms(compiled, data_points):
+    """Mean single-row scoring time over data_points"""
+    compiled.predict_one(data_points[0])
+    t0 = time.perf_counter()
+    for data_point in data_points:
+        compiled.predict_one(data_point)
+    return (time.perf_counter() - t0) * 1000 / len(data_points)
+
+def evaluate_band(band, screen_pct, screen_level, full_pct, full_level, y_test, screen_ms, full_ms):
+    """Coverage, decision agreement and latency of the cascade at one band"""
+    band_low, band_high = band
+    clear = (screen_pct < band_low) | (screen_pct > band_high)
+    cascade_pct = np.where(clear, screen_pct, full_pct)
+    cascade_level = np.where(clear, screen_level, full_level)
+    full_tier = recommendation_tier(full_pct)
+    return {
+        'band': [band_low, band_high],
+        'screened_fraction': float(clear.mean()),
+        'tier_agreement': float((recommendation_tier(cascade_pct) == full_tier).mean()),
+        'screened_tier_agreement': float((recommendation_tier(screen_pct[clear]) == full_tier[clear]).mean()) if clear.any() else None,
+        'cascade_accuracy': float(accuracy_score(y_test, cascade_level)),
+        'mean_latency_ms': float(screen_ms + (1 - clear.mean()) * full_ms)
+    }
+
+def held_out_screen_proba(data, served, n_folds, n_estimators, max_depth):
+    """Screen probabilities for every served row from a screen that never saw that customer's rows
+
+    Customers are split into folds; each fold's screen is trained on the other
+    customers' monthly rows and scores the fold's served rows.
+    """
+    X, y = data[NUMERIC_FEATURES + CATEGORICAL_FEATURES], data['Risk_Level']
+    points = served[NUMERIC_FEATURES + CATEGORICAL_FEATURES].to_dict('records')
+    proba, classes = None, None
+    for train_index, test_index in GroupKFold(n_splits=n_folds).split(X, y, groups=data['Customer_ID']):
+        screen = build_screen(n_estimators, max_depth)
+        screen.fit(X.iloc[train_index], y.iloc[train_index])
+        compiled = compile_model(screen)
+        held_out = np.flatnonzero(served['Customer_ID'].isin(set(data['Customer_ID'].iloc[test_index])).to_numpy())
+        fold_proba = compiled.predict_proba([points[i] for i in held_out])
+        if proba is None:
+            classes = compiled.classes
+            proba = np.zeros((len(points), len(classes)))
+        proba[held_out] = fold_proba
+    return proba, classes
+
+def main():
+    """Train the cascade screen model and report its accuracy/latency tradeoff on held-out customers"""
+    parser = argparse.ArgumentParser(description='Train the cascade screen model')
+    parser.add_argument('--output', default=CASCADE_MODEL_FILE, help='Screen model artifact to write')
+    parser.add_argument('--trees', type=int, default=30, help='Trees in the screen forest')
+    parser.add_argument('--max-depth', type=int, default=6, help='Depth of the screen trees')
+    parser.add_argument('--band-low', type=float, help='Lower edge of the uncertainty band (high-risk %%)')
+    parser.add_argument('--band-high', type=float, help='Upper edge of the uncertainty band (high-risk %%)')
+    parser.add_argument('--min-agreement', type=float, default=DEFAULT_MIN_AGREEMENT,
+                        help='Tier agreement with the full ensemble required when choosing a band')
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS, help='Customer folds for the held-out evaluation')
+    parser.add_argument('--loan-amounts', type=float, nargs='+', default=LOAN_AMOUNT_GRID,
+                        help='Loan amounts each held-out customer is scored with')
+    args = parser.parse_args()
+
+    print("🚀 Training cascade screen model")
+    print("=" * 50)
+    raw = load_bank_rows()
+    data = prepare_rows(raw)
+    # Bands are chosen on what /process scores: customer averages with the loan added
+    served = served_rows(raw, args.loan_amounts)
+    y_test = served['Risk_Level'].to_numpy()
+    test_points = served[NUMERIC_FEATURES + CATEGORICAL_FEATURES].to_dict('records')
+    customers = len(served[['Source_Bank', 'Customer_ID']].drop_duplicates())
+    print(f"✓ {customers} customers x {len(args.loan_amounts)} loan amounts = "
+          f"{len(served)} served rows, evaluated over {args.folds} customer folds")
+
+    screen_proba, screen_classes = held_out_screen_proba(data, served, args.folds, args.trees, args.max_depth)
+
+    screen = build_screen(args.trees, args.max_depth)
+    screen.fit(data[NUMERIC_FEATURES + CATEGORICAL_FEATURES], data['Risk_Level'])
+    compiled_screen = compile_model(screen)
+    print(f"✓ Screen trained on {len(data)} rows")
+
+    # Full ensemble reference: B-Bank when it exists, else the mean of the bank models
+    full_models = {}
+    for name, filename in MODEL_FILES.items():
+        if os.path.exists(filename):
+            full_models[name] = compile_model(joblib.load(filename))
+    full_models = {name: model for name, model in full_models.items() if model is not None}
+    if not full_models:
+        print("✗ No bank models found to compare against")
+        sys.exit(1)
+    reference = ['bbank'] if 'bbank' in full_models else sorted(full_models)
+    print(f"✓ Reference decision from: {', '.join(name.upper() for name in reference)}")
+
+    full_proba = np.mean([full_models[name].predict_proba(test_points) for name in reference], axis=0)
+    screen_pct, full_pct = screen_proba[:, -1] * 100, full_proba[:, -1] * 100
+    screen_level = screen_classes[np.argmax(screen_proba, axis=1)]
+    full_level = full_models[reference[0]].classes[np.argmax(full_proba, axis=1)]
+
+    # Single-row latency: one screen call against all four bank models
+    sample = test_points[:LATENCY_SAMPLES]
+    screen_ms = mean_latency_ms(compiled_screen, sample)
+    full_ms = sum(mean_latency_ms(model, sample) for model in full_models.values()) * 4 / len(full_models)
+
+    bands = CANDIDATE_BANDS
+    if args.band_low is not None and args.band_high is not None:
+        bands = [(args.band_low, args.band_high)]
+    results = [evaluate_band(band, screen_pct, screen_level, full_pct, full_level, y_test, screen_ms, full_ms)
+               for band in bands]
+
+    print(f"\n{'Band':<14} {'Screened':>9} {'Tier agree':>11} {'Accuracy':>9} {'Mean ms':>8}")
+    print("-" * 56)
+    for result in results:
+        band = f"{result['band'][0]:g}-{result['band'][1]:g}%"
+        print(f"{band:<14} {result['screened_fraction']:>9.1%} {result['tier_agreement']:>11.1%} "
+              f"{result['cascade_accuracy']:>9.3f} {result['mean_latency_ms']:>8.2f}")
+    print(f"{'full only':<14} {0:>9.1%} {1:>11.1%} {accuracy_score(y_test, full_level):>9.3f} {full_ms:>8.2f}")
+
+    # Widest coverage that still agrees with the full ensemble often enough
+    eligible = [r for r in results if r['tier_agreement'] >= args.min_agreement] or [max(results, key=lambda r: r['tier_agreement'])]
+    chosen = max(eligible, key=lambda r: r['screened_fraction'])
+    print(f"\n✓ Band {chosen['band'][0]:g}-{chosen['band'][1]:g}%: {chosen['screened_fraction']:.1%} screened, "
+          f"{chosen['tier_agreement']:.1%} tier agreement")
+
+    report = {
+        'trained_at': datetime.now().isoformat(),
+        'training_rows': len(data),
+        'evaluation': {'customers': customers, 'folds': args.folds,
+                       'loan_amounts': list(args.loan_amounts), 'served_rows': len(served)},
+        'screen': {'trees': args.trees, 'max_depth': args.max_depth,
+                   'accuracy': float(accuracy_score(y_test, screen_level)), 'latency_ms': screen_ms},
+        'full_ensemble': {'reference': reference, 'accuracy': float(accuracy_score(y_test, full_level)),
+                          'latency_ms': full_ms},
+        'bands': results,
+        'chosen_band': chosen['band']
+    }
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    joblib.dump({'model': screen, 'band': tuple(chosen['band']), 'metadata': report}, args.output)
+    report_file = args.output.replace('.pkl', '_report.json')
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Screen model saved to {args.output}")
+    print(f"💾 Tradeoff report saved to {report_file}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import pandas as pd
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import log_loss
+from sklearn.model_selection import HalvingRandomSearchCV, train_test_split
+import warnings
+warnings.filterwarnings('ignore')
+
+# Run from the project root so the bank extracts and the registry resolve
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from model_training import MODEL_REGISTRY_FILE, build_pipeline, cached_training_frame, forest_params, load_model_registry
+from training_cache import load_bank_frame
+
+# Configuration
+BANKS = {
+    'sb': ('SB', 'SB_Train_data.csv'),
+    'pb': ('PB', 'PB_Train_data.csv'),
+    'fnb': ('FNB', 'FNB_Train_data.csv'),
+    'bbank': ('B-Bank', 'B-Bank_Train_data.csv')
+}
+# Forest settings the search samples from; n_estimators is the halving resource
+PARAM_DISTRIBUTIONS = {
+    'classifier__max_depth': [6, 8, 10, 12, 15, 20, None],
+    'classifier__min_samples_split': [2, 5, 10, 20],
+    'classifier__min_samples_leaf': [1, 2, 5, 10, 20],
+    'classifier__max_features': ['sqrt', 0.5, None]
+}
+DEFAULT_BUDGET_MINUTES = 60
+DEFAULT_MIN_TREES = 25
+DEFAULT_MAX_TREES = 300
+DEFAULT_FACTOR = 3
+DEFAULT_MAX_CANDIDATES = 200
+CV_FOLDS = 3
+# Objective: log-loss plus a cost per 1000 tree nodes visited per scored row and per MB of forest
+DEFAULT_LATENCY_WEIGHT = 0.01
+DEFAULT_SIZE_WEIGHT = 0.005
+# Fitted sklearn tree node plus its per-class value slots
+NODE_BYTES = 64
+VALUE_BYTES = 8
+# Search cost estimates are padded for deeper candidates than the probe fit
+BUDGET_SAFETY = 1.5
+
+def load_tuning_frame(bank):
+    """A bank's training extract; B-Bank is combined from the other banks when its file is missing"""
+    model_name, filename = BANKS[bank]
+    if bank != 'bbank' or os.path.exists(filename):
+        return load_bank_frame(bank, filename)
+    frames = []
+    for other in ['sb', 'pb', 'fnb']:
+        data = load_bank_frame(other, BANKS[other][1])
+        data['Source_Bank'] = other.upper()
+        frames.append(data)
+    combined = pd.concat(frames, ignore_index=True)
+    return combined.drop_duplicates(subset=['Customer_ID'], keep='first')
+
+def forest_cost(pipeline, X):
+    """Tree nodes visited per row of X and the fitted forest's size in MB"""
+    forest = pipeline.named_steps['classifier']
+    indicator, _ = forest.decision_path(pipeline.named_steps['preprocessor'].transform(X))
+    nodes = sum(tree.tree_.node_count for tree in forest.estimators_)
+    size_mb = nodes * (NODE_BYTES + VALUE_BYTES * len(forest.classes_)) / (1024 * 1024)
+    return indicator.nnz / len(X), size_mb
+
+def evaluate(pipeline, X, y, latency_weight, size_weight):
+    """Log-loss, cost terms and the combined objective (lower is better) of a fitted pipeline"""
+    loss = log_loss(y, pipeline.predict_proba(X), labels=pipeline.classes_)
+    visits, size_mb = forest_cost(pipeline, X)
+    return {
+        'log_loss': round(float(loss), 5),
+        'node_visits_per_row': round(float(visits), 1),
+        'size_mb': round(float(size_mb), 3),
+        'objective': round(float(loss + latency_weight * visits / 1000 + size_weight * size_mb), 5)
+    }
+
+def objective_scorer(latency_weight, size_weight):
+    """Search scorer; sklearn maximises, so it returns the negated objective"""
+    def score(pipeline, X, y):
+        return -evaluate(pipeline, X, y, latency_weight, size_weight)['objective']
+    return score
+
+def halving_iterations(min_trees, max_trees, factor):
+    return int(math.log(max_trees / min_trees, factor)) + 1
+
+def workers(n_jobs):
+    return joblib.cpu_count() if n_jobs < 0 else max(1, n_jobs)
+
+def refit_seconds(probe_seconds, args):
+    """Estimated time of the winner's refit on the whole training split at the most trees"""
+    return probe_seconds * (args.max_trees / args.min_trees) * BUDGET_SAFETY / workers(args.jobs)
+
+def planned_fits(candidates, args):
+    """Fits one bank's tuning makes: every halving round's candidates x folds, plus the baseline, probe and winner fits"""
+    iterations = halving_iterations(args.min_trees, args.max_trees, args.factor)
+    rounds = [candidates]
+    for _ in range(iterations - 1):
+        rounds.append(math.ceil(rounds[-1] / args.factor))
+    return sum(rounds) * CV_FOLDS + 3
+
+def plan_candidates(probe_seconds, budget_seconds, args):
+    """Candidates the search can afford within the budget, or 0 when not even the smallest search fits
+
+    Each halving round costs about the same (a factor fewer candidates, a factor
+    more trees), so the search costs rounds x candidates x folds probe fits.
+    """
+    iterations = halving_iterations(args.min_trees, args.max_trees, args.factor)
+    per_candidate = iterations * CV_FOLDS * probe_seconds * BUDGET_SAFETY / workers(args.jobs)
+    affordable = int(budget_seconds / per_candidate) if per_candidate > 0 else args.max_candidates
+    smallest = args.factor ** (iterations - 1)
+    if affordable < smallest:
+        return 0
+    return min(affordable, args.max_candidates)
+
+def tune_bank(bank, budget_seconds, args):
+    """Successive-halving search for one bank; returns its registry entry or None"""
+    started = time.perf_counter()
+    model_name = BANKS[bank][0]
+    data = load_tuning_frame(bank)
+    try:
+        X, y, numeric_available, categorical_available = cached_training_frame(data, model_name)
+    except ValueError as e:
+        print(f"✗ {model_name}: {e}")
+        return None
+    # Same holdout as training, so the search never sees the rows the winner is judged on
+    try:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    except ValueError:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    current = forest_params(model_name)
+    baseline_model = build_pipeline(numeric_available, categorical_available, current, n_jobs=args.jobs).fit(X_train, y_train)
+    baseline = evaluate(baseline_model, X_test, y_test, args.latency_weight, args.size_weight)
+
+    probe_params = dict(current, n_estimators=args.min_trees)
+    t0 = time.perf_counter()
+    build_pipeline(numeric_available, categorical_available, probe_params, n_jobs=1).fit(X_train, y_train)
+    probe_seconds = time.perf_counter() - t0
+    # Loading and the baseline and probe fits have used part of the budget and the winner's refit needs its share
+    search_budget = budget_seconds - (time.perf_counter() - started) - refit_seconds(probe_seconds, args)
+    candidates = plan_candidates(probe_seconds, search_budget, args)
+    if not candidates:
+        print(f"⚠️ {model_name}: budget of {budget_seconds:.0f}s is too small for a search, skipped")
+        return None
+
+    print(f"🔄 {model_name}: {candidates} candidates ({planned_fits(candidates, args)} fits), "
+          f"{args.min_trees}→{args.max_trees} trees, {len(X_train)} rows, {workers(args.jobs)} workers")
+    search = HalvingRandomSearchCV(
+        build_pipeline(numeric_available, categorical_available, dict(current), n_jobs=1),
+        PARAM_DISTRIBUTIONS,
+        n_candidates=candidates,
+        resource='classifier__n_estimators',
+        min_resources=args.min_trees,
+        max_resources=args.max_trees,
+        factor=args.factor,
+        cv=CV_FOLDS,
+        scoring=objective_scorer(args.latency_weight, args.size_weight),
+        n_jobs=args.jobs,
+        random_state=args.seed,
+        refit=False
+    )
+    t0 = time.perf_counter()
+    search.fit(X_train, y_train)
+    search_seconds = time.perf_counter() - t0
+
+    params = dict(current)
+    params.update({name.split('__', 1)[1]: value for name, value in search.best_params_.items()})
+    winner = build_pipeline(numeric_available, categorical_available, params, n_jobs=args.jobs).fit(X_train, y_train)
+    tuned = evaluate(winner, X_test, y_test, args.latency_weight, args.size_weight)
+    fits = sum(search.n_candidates_) * CV_FOLDS + 3
+
+    print(f"✓ {model_name}: objective {baseline['objective']:.4f} → {tuned['objective']:.4f} "
+          f"(log-loss {baseline['log_loss']:.4f} → {tuned['log_loss']:.4f}, "
+          f"{baseline['node_visits_per_row']:.0f} → {tuned['node_visits_per_row']:.0f} nodes/row, "
+          f"{baseline['size_mb']:.1f} → {tuned['size_mb']:.1f} MB), {fits} fits in {time.perf_counter() - started:.0f}s")
+    if tuned['objective'] > baseline['objective']:
+        print(f"⚠️ {model_name}: tuned config is worse on the holdout, keeping the current settings")
+        params, tuned = current, baseline
+
+    return {
+        'params': params,
+        'holdout': tuned,
+        'baseline': {'params': current, **baseline},
+        'samples': len(X),
+        'candidates': candidates,
+        'fits': fits,
+        'search_seconds': round(search_seconds, 1),
+        'tuned_at': datetime.now().isoformat()
+    }
+
+def save_registry(registry, path):
+    """Write the registry atomically so training never reads a half-written file"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    staging = path + '.writing'
+    with open(staging, 'w') as f:
+        json.dump(registry, f, indent=2)
+    os.replace(staging, path)
+
+def main():
+    """Tune each bank's forest with successive halving and record the winners in the model registry"""
+    parser = argparse.ArgumentParser(description='Successive-halving hyperparameter search per bank')
+    parser.add_argument('--banks', nargs='+', choices=list(BANKS), default=list(BANKS), help='Banks to tune')
+    parser.add_argument('--budget-minutes', type=float, default=DEFAULT_BUDGET_MINUTES,
+                        help='Wall-clock budget for the whole run, shared across the banks')
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel fits (-1 for every core)')
+    parser.add_argument('--min-trees', type=int, default=DEFAULT_MIN_TREES, help='Trees per candidate in the first round')
+    parser.add_argument('--max-trees', type=int, default=DEFAULT_MAX_TREES, help='Trees per candidate in the last round')
+    parser.add_argument('--factor', type=int, default=DEFAULT_FACTOR, help='Halving factor between rounds')
+    parser.add_argument('--max-candidates', type=int, default=DEFAULT_MAX_CANDIDATES, help='Upper bound on sampled configs')
+    parser.add_argument('--latency-weight', type=float, default=DEFAULT_LATENCY_WEIGHT,
+                        help='Objective cost per 1000 tree nodes visited per row')
+    parser.add_argument('--size-weight', type=float, default=DEFAULT_SIZE_WEIGHT, help='Objective cost per MB of forest')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for candidate sampling')
+    parser.add_argument('--registry', default=MODEL_REGISTRY_FILE, help='Model registry to update')
+    parser.add_argument('--dry-run', action='store_true', help="Report the winners without updating the registry")
+    args = parser.parse_args()
+
+    print("🚀 Tuning bank models")
+    print("=" * 50)
+    deadline = time.perf_counter() + args.budget_minutes * 60
+    registry = load_model_registry(args.registry)
+    tuned = {}
+    for position, bank in enumerate(args.banks):
+        # Split what is left evenly over the banks still to tune
+        remaining = deadline - time.perf_counter()
+        entry = tune_bank(bank, remaining / (len(args.banks) - position), args)
+        if entry:
+            tuned[BANKS[bank][0]] = entry
+
+    print(f"\n⏱ Tuning finished in {args.budget_minutes * 60 - (deadline - time.perf_counter()):.0f}s "
+          f"of a {args.budget_minutes * 60:.0f}s budget")
+    if not tuned or args.dry_run:
+        print("📋 Model registry not updated")
+        return
+    registry.setdefault('banks', {}).update(tuned)
+    registry['objective'] = {'latency_weight': args.latency_weight, 'size_weight': args.size_weight}
+    registry['updated_at'] = datetime.now().isoformat()
+    save_registry(registry, args.registry)
+    print(f"💾 Model registry updated for {', '.join(tuned)}: {args.registry}")
+    print("   Retrain with scripts/train_individual_modules.py (or delete a model file) to apply the new settings")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+import math
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.metrics import accuracy_score
+
+from model_artifacts import save_model
+from model_training import build_pipeline, clean_training_rows, forest_params
+
+# Out-of-core training for bank models whose data does not fit in memory, used for the combined
+# B-Bank model. The extracts are read twice in chunks; only bounded samples, a shuffle buffer and
+# the growing forest are ever held in memory.
+
+# Rows sampled to fit the scaler, encoder and fill values, and held out for calibration and evaluation
+DEFAULT_SAMPLE_ROWS = 200000
+DEFAULT_HOLDOUT_ROWS = 100000
+HOLDOUT_FRACTION = 0.2
+# Rows each batch of trees is fitted on; the shuffle buffer mixes this many blocks across chunks
+DEFAULT_BLOCK_ROWS = 50000
+SHUFFLE_BLOCKS = 4
+MIN_HOLDOUT_ROWS = 100
+
+class Reservoir:
+    """Uniform random sample of at most size rows from a stream of chunks
+
+    Every row gets a random key and the rows with the smallest keys seen so far
+    are kept, so the sample never grows past size however long the stream is.
+    """
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.frame = None
+        self.keys = np.empty(0)
+
+    def add(self, chunk):
+        keys = self.rng.random(len(chunk))
+        if len(self.keys) >= self.size:
+            keep = keys < self.keys.max()
+            chunk, keys = chunk[keep], keys[keep]
+        if not len(chunk):
+            return
+        frame = chunk if self.frame is None else pd.concat([self.frame, chunk], ignore_index=True)
+        keys = np.concatenate([self.keys, keys])
+        if len(keys) > self.size:
+            kept = np.argpartition(keys, self.size - 1)[:self.size]
+            frame, keys = frame.iloc[kept].reset_index(drop=True), keys[kept]
+        self.frame, self.keys = frame, keys
+
+    def __len__(self):
+        return len(self.keys)
+
+def iter_clean_chunks(sources, model_name):
+    """Cleaned chunks from every source, tagged with the bank they came from
+
+    sources is a list of (bank, chunks) pairs; each call of chunks() starts a
+    fresh pass over that bank's extract.
+    """
+    for bank, chunks in sources:
+        for chunk in chunks():
+            yield clean_training_rows(chunk.assign(Source_Bank=bank.upper()), model_name)
+
+def scan_sources(sources, model_name, sample_rows, rng):
+    """First pass: row and class counts, category counts and a uniform sample of the feature rows"""
+    sample = Reservoir(sample_rows, rng)
+    class_counts = pd.Series(dtype=float)
+    category_counts = {}
+    rows = 0
+    features = None
+    for data, numeric_features, categorical_cols in iter_clean_chunks(sources, model_name):
+        if features is None:
+            features = (numeric_features, categorical_cols)
+        rows += len(data)
+        class_counts = class_counts.add(data['Risk_Level'].value_counts(), fill_value=0)
+        for col in categorical_cols:
+            counts = category_counts.get(col, pd.Series(dtype=float))
+            category_counts[col] = counts.add(data[col].value_counts(), fill_value=0)
+        sample.add(data[numeric_features + categorical_cols + ['Risk_Level']])
+    return rows, class_counts, category_counts, sample.frame, features
+
+def fill_values(sample, numeric_features, category_counts):
+    """Missing-value fills: numeric medians from the sample, categorical modes over all rows"""
+    values = {col: sample[col].median() for col in numeric_features}
+    for col, counts in category_counts.items():
+        values[col] = counts.idxmax() if len(counts) else 'Unknown'
+    return values
+
+def train_streaming_model(sources, model_name, model_file=None, block_rows=DEFAULT_BLOCK_ROWS,
+                          sample_rows=DEFAULT_SAMPLE_ROWS, holdout_rows=DEFAULT_HOLDOUT_ROWS, seed=42):
+    """Fit a calibrated bank model on extracts read in chunks, never holding all rows in memory
+
+    Trees are grown with warm_start, each batch on a shuffled block of rows, and
+    calibrated with isotonic regression on a held-out sample. The result is a
+    CalibratedClassifierCV around the usual preprocessing + forest pipeline, so the
+    app and the compiled scoring path serve it like any other bank model.
+    """
+    t0 = time.perf_counter()
+    print(f"🔄 Training {model_name} model out of core (blocks of {block_rows} rows)...")
+    rng = np.random.default_rng(seed)
+
+    rows, class_counts, category_counts, sample, features = scan_sources(sources, model_name, sample_rows, rng)
+    if features is None or rows < 50:
+        print(f"✗ Insufficient data for {model_name} model (only {rows} samples)")
+        return None, None
+    if len(class_counts) < 2:
+        print(f"✗ Insufficient target variety for {model_name} model")
+        return None, None
+    numeric_features, categorical_cols = features
+    columns = numeric_features + categorical_cols
+    fills = fill_values(sample, numeric_features, category_counts)
+
+    params = forest_params(model_name)
+    n_trees = params['n_estimators']
+    pipeline = build_pipeline(numeric_features, categorical_cols, params)
+    preprocessor = pipeline.named_steps['preprocessor']
+    forest = pipeline.named_steps['classifier']
+    preprocessor.fit(sample[columns].fillna(fills))
+    print(f"✓ Pass 1: {rows} rows scanned, preprocessing fitted on a {len(sample)}-row sample")
+    del sample
+
+    # Balanced class weights from the counts over all rows rather than per block
+    classes = set(class_counts.index)
+    weights = {label: rows / (len(classes) * count) for label, count in class_counts.items()}
+    forest.set_params(warm_start=True, class_weight=weights)
+    expected_blocks = max(1, math.ceil(rows * (1 - HOLDOUT_FRACTION) / block_rows))
+    state = {'grown': 0, 'quota': 0.0, 'blocks': 0, 'skipped': 0}
+
+    def grow(block, last):
+        """Add this block's share of the trees, fitted on the block alone"""
+        state['quota'] += n_trees / expected_blocks
+        trees = n_trees - state['grown'] if last else min(int(state['quota']) - state['grown'], n_trees - state['grown'])
+        if trees <= 0:
+            return
+        if set(block['Risk_Level'].unique()) != classes:
+            # Every fit must see every class or the trees' outputs would not line up
+            state['skipped'] += 1
+            return
+        forest.set_params(n_estimators=state['grown'] + trees)
+        forest.fit(preprocessor.transform(block[columns]), block['Risk_Level'])
+        state['grown'] += trees
+        state['blocks'] += 1
+
+    holdout = Reservoir(holdout_rows, rng)
+    buffer = []
+    buffered = 0
+    for data, _, _ in iter_clean_chunks(sources, model_name):
+        data = data[columns + ['Risk_Level']].fillna(fills)
+        held = rng.random(len(data)) < HOLDOUT_FRACTION
+        holdout.add(data[held])
+        buffer.append(data[~held])
+        buffered += int((~held).sum())
+        while buffered >= block_rows * SHUFFLE_BLOCKS:
+            pool = pd.concat(buffer, ignore_index=True)
+            pool = pool.iloc[rng.permutation(len(pool))]
+            grow(pool.iloc[:block_rows], last=False)
+            buffer = [pool.iloc[block_rows:]]
+            buffered = len(buffer[0])
+    pool = pd.concat(buffer, ignore_index=True) if buffer else pd.DataFrame(columns=columns + ['Risk_Level'])
+    pool = pool.iloc[rng.permutation(len(pool))]
+    del buffer
+    for start in range(0, len(pool), block_rows):
+        grow(pool.iloc[start:start + block_rows], last=start + block_rows >= len(pool))
+    del pool
+
+    if not state['grown']:
+        print(f"✗ No block of {model_name} data had every risk level, no trees were grown")
+        return None, None
+    if len(holdout) < MIN_HOLDOUT_ROWS:
+        print(f"✗ Too few held-out rows to calibrate the {model_name} model ({len(holdout)})")
+        return None, None
+    print(f"✓ Pass 2: {state['grown']} trees grown on {state['blocks']} blocks"
+          + (f", {state['skipped']} blocks skipped" if state['skipped'] else ""))
+
+    # Half of the held-out sample calibrates, the other half evaluates
+    holdout = holdout.frame.iloc[rng.permutation(len(holdout))]
+    calibration, test = holdout.iloc[:len(holdout) // 2], holdout.iloc[len(holdout) // 2:]
+    forest.set_params(warm_start=False)
+    calibrated_model = CalibratedClassifierCV(pipeline, method='isotonic', cv='prefit')
+    calibrated_model.fit(calibration[columns], calibration['Risk_Level'])
+    accuracy = accuracy_score(test['Risk_Level'], calibrated_model.predict(test[columns]))
+    seconds = time.perf_counter() - t0
+    print(f"✓ {model_name} Model trained successfully - Accuracy: {accuracy:.4f} ({seconds:.1f}s)")
+
+    if model_file:
+        size, codec = save_model(calibrated_model, model_file)
+        print(f"💾 {model_name} Model saved to {model_file} ({codec}, {size / 1024 ** 2:.1f} MB)")
+
+    return calibrated_model, {
+        'accuracy': accuracy,
+        'feature_importance': forest.feature_importances_,
+        'feature_names': columns,
+        'forest_params': dict(params, n_estimators=state['grown']),
+        'rows': rows,
+        'blocks': state['blocks'],
+        'skipped_blocks': state['skipped'],
+        'calibration_rows': len(calibration),
+        'test_rows': len(test),
+        'seconds': round(seconds, 1)
+    }
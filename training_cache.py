@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from feature_schema import NUMERIC_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Columnar cache of bank extracts for training, one Parquet file per bank
+TRAINING_CACHE_DIR = os.environ.get('TRAINING_CACHE_DIR', os.path.join('saved_models', 'training_cache'))
+
+# Column layout of the bank CSV extracts; cached files always carry exactly these
+EXTRACT_COLUMNS = ['ID', 'Customer_ID', 'Month', 'Name', 'Age', 'SSN', 'Occupation', 'Annual_Income',
+                   'Monthly_Inhand_Salary', 'Num_Bank_Accounts', 'Num_Credit_Card', 'Interest_Rate',
+                   'Num_of_Loan', 'Type_of_Loan', 'Delay_from_due_date', 'Num_of_Delayed_Payment',
+                   'Changed_Credit_Limit', 'Num_Credit_Inquiries', 'Credit_Mix', 'Outstanding_Debt',
+                   'Credit_Utilization_Ratio', 'Credit_History_Age', 'Payment_of_Min_Amount',
+                   'Total_EMI_per_month', 'Amount_invested_monthly', 'Payment_Behaviour', 'Monthly_Balance']
+
+# Text pandas reads as missing in a CSV by default, so Excel cells holding it match the CSV extracts
+MISSING_TEXT = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+
+def cache_path(bank, directory=TRAINING_CACHE_DIR):
+    return os.path.join(directory, f'{bank}.parquet')
+
+def has_bank(bank, directory=TRAINING_CACHE_DIR):
+    """True when a cached extract for bank exists and can be read"""
+    return pq is not None and os.path.exists(cache_path(bank, directory))
+
+def _text(value):
+    """Cell value as the text a CSV export would hold; None for blanks"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    text = str(value).strip()
+    return None if text in MISSING_TEXT else text
+
+def normalise_frame(frame):
+    """A chunk from any source in the extract layout: numeric columns as float64, the rest as text"""
+    frame = frame.rename(columns=lambda column: str(column).strip())
+    normalised = pd.DataFrame(index=range(len(frame)))
+    for column in EXTRACT_COLUMNS:
+        values = frame[column].to_numpy() if column in frame.columns else np.full(len(frame), None, dtype=object)
+        if column in NUMERIC_COLUMNS:
+            normalised[column] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').astype(np.float64)
+        else:
+            normalised[column] = pd.Series([_text(value) for value in values], dtype=object)
+    return normalised
+
+def cache_schema():
+    return pa.schema([(column, pa.float64() if column in NUMERIC_COLUMNS else pa.string()) for column in EXTRACT_COLUMNS])
+
+class CacheWriter:
+    """Appends normalised chunks to a bank's cache file as Parquet row groups
+
+    Writes go to a temporary file that replaces the cached extract on close,
+    so readers never see a half-written cache.
+    """
+
+    def __init__(self, bank, directory=TRAINING_CACHE_DIR):
+        if pq is None:
+            raise RuntimeError("pyarrow is required for the training cache (pip install pyarrow)")
+        os.makedirs(directory, exist_ok=True)
+        self.path = cache_path(bank, directory)
+        self.staging = self.path + '.writing'
+        self.schema = cache_schema()
+        self.writer = pq.ParquetWriter(self.staging, self.schema, compression='snappy')
+        self.rows = 0
+
+    def write(self, frame):
+        """Normalise and append one chunk"""
+        chunk = normalise_frame(frame)
+        if len(chunk):
+            self.writer.write_table(pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False))
+            self.rows += len(chunk)
+
+    def close(self):
+        self.writer.close()
+        os.replace(self.staging, self.path)
+        return self.rows
+
+    def abort(self):
+        self.writer.close()
+        os.remove(self.staging)
+
+def read_bank(bank, columns=None, directory=TRAINING_CACHE_DIR):
+    """A bank's cached extract, optionally only some columns"""
+    return pq.read_table(cache_path(bank, directory), columns=columns).to_pandas()
+
+def load_bank_frame(bank, csv_file, directory=TRAINING_CACHE_DIR):
+    """A bank's extract from the training cache when ingested, else from its CSV"""
+    if has_bank(bank, directory):
+        return read_bank(bank, directory=directory)
+    return pd.read_csv(csv_file)
+
+def iter_file_chunks(path, chunk_rows):
+    """DataFrame chunks of at most chunk_rows from a Parquet or CSV extract, read from disk one at a time"""
+    if path.lower().endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+def iter_bank_chunks(bank, csv_file, chunk_rows, directory=TRAINING_CACHE_DIR):
+    """A bank's extract in chunks, from the training cache when ingested, else from its CSV"""
+    return iter_file_chunks(cache_path(bank, directory) if has_bank(bank, directory) else csv_file, chunk_rows)
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from customer_aggregates import RISK_LEVELS, aggregate_customers, mode_per_group
+from feature_schema import NUMERIC_FEATURES, CATEGORICAL_FEATURES
+from model_training import clean_training_rows
+from training_cache import load_bank_frame
+
+# Bank extracts and model artifacts shared by the training and evaluation scripts
+BANK_FILES = {
+    'sb': 'SB_Train_data.csv',
+    'pb': 'PB_Train_data.csv',
+    'fnb': 'FNB_Train_data.csv'
+}
+MODEL_FILES = {
+    'sb': 'SB_loan_risk_model.pkl',
+    'pb': 'PB_loan_risk_model.pkl',
+    'fnb': 'FNB_loan_risk_model.pkl',
+    'bbank': 'B-Bank_loan_risk_model.pkl'
+}
+
+def load_bank_rows():
+    """Raw monthly rows of every bank extract tagged with Source_Bank, from the training cache when ingested"""
+    frames = []
+    for bank, filename in BANK_FILES.items():
+        try:
+            data = load_bank_frame(bank, filename)
+            data['Source_Bank'] = bank.upper()
+            frames.append(data)
+            print(f"✓ {bank.upper()} data loaded: {data.shape}")
+        except Exception as e:
+            print(f"⚠️ Could not load {bank.upper()} data: {e}")
+    if not frames:
+        raise RuntimeError("No bank datasets available")
+    return pd.concat(frames, ignore_index=True)
+
+def prepare_rows(data):
+    """Bank rows cleaned the way the bank models are trained, with missing features filled"""
+    data, _, _ = clean_training_rows(data, 'B-Bank')
+    for col in NUMERIC_FEATURES:
+        data[col] = data[col].fillna(data[col].median())
+    for col in CATEGORICAL_FEATURES:
+        data[col] = data[col].fillna(data[col].mode()[0] if len(data[col].mode()) > 0 else 'Unknown')
+    return data
+
+def load_training_rows():
+    """All bank extracts prepared the way the bank models are trained"""
+    return prepare_rows(load_bank_rows())
+
+def served_rows(data, loan_amounts):
+    """What /process scores for each customer in raw bank rows, once per loan amount
+
+    Each bank's customers are aggregated the way serving aggregates them and the
+    loan is added to Outstanding_Debt, as calculate_enhanced_averages does. Rows
+    also carry Customer_ID, Source_Bank, Loan_Amount and the customer's most
+    common Risk_Level.
+    """
+    frames = []
+    for bank, rows in data.groupby('Source_Bank', sort=False):
+        averages = aggregate_customers(rows).drop(columns='Rows')
+        levels = rows['Credit_Mix'].map(RISK_LEVELS).fillna(1).to_numpy()
+        averages['Risk_Level'] = mode_per_group(rows['Customer_ID'].to_numpy(), levels).reindex(averages.index).fillna(1)
+        averages['Source_Bank'] = bank
+        for amount in loan_amounts:
+            shifted = averages.copy()
+            shifted['Outstanding_Debt'] = averages['Outstanding_Debt'] + amount
+            shifted['Loan_Amount'] = float(amount)
+            frames.append(shifted.reset_index())
+    return pd.concat(frames, ignore_index=True)